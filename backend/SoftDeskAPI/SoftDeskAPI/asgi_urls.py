@@ -0,0 +1,30 @@
+"""SoftDeskAPI URL Configuration of the ASGI server
+
+Same routes as SoftDeskAPI.urls, with the list and detail routes of projects, issues and comments served
+by async views. support.async_views.AsyncReadMiddleware selects it for the requests received through ASGI.
+"""
+from django.urls import URLPattern, include, path
+from support.async_views import async_view
+from support.views import ProjectViewSet, IssueViewSet, CommentViewSet
+
+from SoftDeskAPI.urls import router, urlpatterns as sync_urlpatterns
+
+ASYNC_VIEWSETS = [ProjectViewSet, IssueViewSet, CommentViewSet]
+
+
+def async_patterns(patterns):
+    for pattern in patterns:
+        callback = pattern.callback
+        # the api root view of the router has no viewset nor basename
+        if getattr(callback, 'cls', None) not in ASYNC_VIEWSETS:
+            continue
+        basename = callback.initkwargs['basename']
+        if pattern.name in ['%s-list' % basename, '%s-detail' % basename]:
+            view = async_view(callback.cls, callback.actions, **callback.initkwargs)
+            yield URLPattern(pattern.pattern, view, pattern.default_args, pattern.name)
+
+
+# the async patterns come first and shadow their sync counterparts
+urlpatterns = [
+    path('', include(list(async_patterns(router.urls)))),
+] + sync_urlpatterns
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.0/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
+from importlib.util import find_spec
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -51,10 +52,23 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly'
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.BasicAuthentication',
+        'support.authentication.CachedBasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'support.authentication.CachedJWTAuthentication',
     ),
+    # JSON encoded and decoded with orjson, and MessagePack when the msgpack package is installed,
+    # chosen by the Accept and Content-Type headers (application/json or application/msgpack)
+    'DEFAULT_RENDERER_CLASSES': [
+        'support.renderers.OrjsonRenderer',
+        *(['support.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'support.renderers.OrjsonParser',
+        *(['support.renderers.MessagePackParser'] if find_spec('msgpack') else []),
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 SIMPLE_JWT = {
@@ -62,7 +76,69 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'support-auth',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # or 'django.core.cache.backends.filebased.FileBasedCache' with a directory as LOCATION,
+    # to share the cached responses between the processes of a host
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'support-responses',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Cache holding verified credentials digests and user snapshots of the authentication classes
+SUPPORT_AUTH_CACHE = 'auth'
+
+# Largest page size clients can request through the page_size query parameter
+SUPPORT_MAX_PAGE_SIZE = 100
+
+# Largest number of items accepted by the bulk routes of issues and comments
+SUPPORT_BULK_MAX_BATCH_SIZE = 500
+
+# Rows fetched per database round-trip when streaming a project export
+SUPPORT_EXPORT_CHUNK_SIZE = 500
+
+# Records queries and timings of every request as Server-Timing headers, logs and /metrics/ histograms
+SUPPORT_INSTRUMENTATION = False
+# Number of recent requests kept per route by the instrumentation histograms
+SUPPORT_INSTRUMENTATION_WINDOW = 1000
+
+# Seconds the project ids a user contributes to are shared between requests, 0 to load them on every request
+SUPPORT_MEMBERSHIP_CACHE_TTL = 30
+# Id of the user added as a contributor to every new project, None to add only the author
+SUPPORT_PROJECT_ADMIN_ID = 1
+
+# Serves the project, issue and comment reads from worker threads under ASGI instead of the single sync thread.
+# Pays off when database latency dominates, costs throughput when requests are CPU-bound on a local SQLite
+SUPPORT_ASYNC_READS = False
+
+# Removes the rows of deleted projects from a background thread, False to leave it to purge_deleted_projects
+SUPPORT_DELETION_WORKER = True
+# Rows removed per transaction by the project deletion worker
+SUPPORT_DELETION_BATCH_SIZE = 1000
+
+# Serves the project, contributor, issue and comment reads from .values() rows converted field by field,
+# instead of the model serializers. RowReadTests compares both outputs
+SUPPORT_ROW_READS = True
+
+# Cache serving the list and detail responses of projects, issues and comments, None to disable it
+SUPPORT_RESPONSE_CACHE = None
+# Seconds a cached response is kept, bounding staleness after writes made outside the viewsets
+SUPPORT_RESPONSE_CACHE_TTL = 60
+
 MIDDLEWARE = [
+    'support.instrumentation.InstrumentationMiddleware',
+    'support.async_views.AsyncReadMiddleware',
+    'support.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -99,7 +175,34 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # keeps the connection of each thread open between requests instead of reopening the database
+        'CONN_MAX_AGE': 600,
+    },
+    # a read replica, listed in SUPPORT_DATABASE_REPLICAS; with SQLite, filled by the sync_replicas command
+    # 'replica': {
+    #     'ENGINE': 'django.db.backends.sqlite3',
+    #     'NAME': BASE_DIR / 'replica.sqlite3',
+    #     'CONN_MAX_AGE': 600,
+    # },
+}
+
+DATABASE_ROUTERS = ['support.routers.ReplicaRouter']
+# Aliases of the databases serving the reads of the safe requests, empty to read everything from the primary
+SUPPORT_DATABASE_REPLICAS = []
+# Seconds the reads of a client stay on the primary after one of its writes, to read its own writes.
+# The pins are kept in the default cache, which must be shared by the processes of the server
+SUPPORT_REPLICA_PIN_SECONDS = 5
+
+# Applies SUPPORT_SQLITE_PRAGMAS to every new SQLite connection and funnels the write transactions of a process
+# through one writer lock. Switches the database file to write-ahead logging for good, hence off by default
+SUPPORT_SQLITE_HIGH_CONCURRENCY = False
+# Write-ahead logging so reads never wait for a writer, fsync only at checkpoints, memory-mapped reads,
+# and waiting up to 5 s for a lock instead of failing
+SUPPORT_SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
 }
 
 # Password validation
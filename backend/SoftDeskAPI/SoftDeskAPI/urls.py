@@ -18,7 +18,8 @@ from django.urls import path
 from django.urls import include
 from rest_framework.routers import DefaultRouter
 from rest_framework.authtoken.views import obtain_auth_token
-from support.views import UserViewSet, ProjectViewSet, ContributorViewSet, IssueViewSet, CommentViewSet
+from support.views import UserViewSet, ProjectViewSet, ContributorViewSet, IssueViewSet, CommentViewSet, \
+    SearchViewSet, ChangeViewSet, ProjectDeletionViewSet, MetricsViewSet
 
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
@@ -32,6 +33,10 @@ router.register(r'projects', ProjectViewSet, basename='project')
 router.register(r'contributors', ContributorViewSet, basename='contributor')
 router.register(r'issues', IssueViewSet, basename='issue')
 router.register(r'comments', CommentViewSet, basename='comment')
+router.register(r'search', SearchViewSet, basename='search')
+router.register(r'changes', ChangeViewSet, basename='change')
+router.register(r'deletions', ProjectDeletionViewSet, basename='deletion')
+router.register(r'metrics', MetricsViewSet, basename='metrics')
 
 
 urlpatterns = [
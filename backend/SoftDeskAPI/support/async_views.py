@@ -0,0 +1,68 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.permissions import SAFE_METHODS
+
+from .instrumentation import current_metrics
+
+ASGI_URLCONF = 'SoftDeskAPI.asgi_urls'
+
+
+def render_read(view, request, *args, **kwargs):
+    """
+    Runs a read in a worker thread, renders its response there and releases the database connection
+    of the thread as the request_finished signal does for the main one.
+    """
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_view(viewset, actions, **initkwargs):
+    """
+    Returns an async view of the actions of a viewset for ASGI servers. Reads run in the pool of worker threads
+    rather than on the single thread-sensitive thread shared by every sync view, so concurrent reads no longer
+    wait for each other. Writes stay on the thread-sensitive thread, as do the reads of instrumented requests,
+    whose query wrappers only apply to the connections of that thread.
+    """
+    view = viewset.as_view(actions, **initkwargs)
+
+    async def dispatch(request, *args, **kwargs):
+        if request.method in SAFE_METHODS and current_metrics.get() is None:
+            return await sync_to_async(render_read, thread_sensitive=False)(view, request, *args, **kwargs)
+        return await sync_to_async(view, thread_sensitive=True)(request, *args, **kwargs)
+
+    dispatch.csrf_exempt = True
+    dispatch.cls = viewset
+    dispatch.actions = actions
+    dispatch.initkwargs = initkwargs
+    return dispatch
+
+
+@sync_and_async_middleware
+def AsyncReadMiddleware(get_response):
+    """
+    Routes the requests received through ASGI to the urlconf whose project, issue and comment routes are async,
+    when SUPPORT_ASYNC_READS is set. The requests received through WSGI keep the sync urlconf, which would
+    otherwise start an event loop per call.
+    """
+    if not getattr(settings, 'SUPPORT_ASYNC_READS', False):
+        raise MiddlewareNotUsed
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            if isinstance(request, ASGIRequest):
+                request.urlconf = ASGI_URLCONF
+            return await get_response(request)
+    else:
+        def middleware(request):
+            return get_response(request)
+    return middleware
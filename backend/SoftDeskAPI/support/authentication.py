@@ -0,0 +1,65 @@
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.crypto import constant_time_compare
+from rest_framework.authentication import BasicAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+CREDENTIALS_KEY = 'support:auth:credentials:%s'
+USER_KEY = 'support:auth:user:%s'
+
+
+def get_auth_cache():
+    return caches[getattr(settings, 'SUPPORT_AUTH_CACHE', 'auth')]
+
+
+def credentials_digest(userid, password):
+    message = '%s:%s' % (userid, password)
+    return hmac.new(settings.SECRET_KEY.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+def username_key(userid):
+    return CREDENTIALS_KEY % hashlib.sha256(userid.encode()).hexdigest()
+
+
+def invalidate_user(user):
+    """
+    Drops the cached credentials and snapshot of a user, after a password change or a deletion.
+    """
+    get_auth_cache().delete_many([username_key(user.username), USER_KEY % user.pk])
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    Basic authentication that remembers a keyed digest of verified credentials,
+    so the password hasher only runs on the first request of each cache period.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        auth_cache = get_auth_cache()
+        key = username_key(userid)
+        digest = credentials_digest(userid, password)
+        cached = auth_cache.get(key)
+        if cached is not None and constant_time_compare(cached[0], digest):
+            return cached[1], None
+        user, auth = super().authenticate_credentials(userid, password, request)
+        auth_cache.set(key, (digest, user))
+        return user, auth
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that keeps a snapshot of the token user instead of loading it on every request.
+    """
+
+    def get_user(self, validated_token):
+        auth_cache = get_auth_cache()
+        key = USER_KEY % validated_token.get(api_settings.USER_ID_CLAIM)
+        user = auth_cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            auth_cache.set(key, user)
+        return user
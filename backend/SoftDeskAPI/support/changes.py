@@ -0,0 +1,148 @@
+import base64
+import binascii
+from collections import defaultdict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Project, Contributor, Issue, Comment, Tombstone
+from .deletion import deleted_project_ids
+from .serializers import ProjectSerializer, ContributorSerializer, IssueSerializer, CommentSerializer
+
+# Feed sources in the order they are listed for a same timestamp, with their timestamp field
+SOURCES = [
+    ('project', Project, 'updated_at', ProjectSerializer),
+    ('contributor', Contributor, 'updated_at', ContributorSerializer),
+    ('issue', Issue, 'updated_at', IssueSerializer),
+    ('comment', Comment, 'updated_at', CommentSerializer),
+    ('tombstone', Tombstone, 'deleted_at', None),
+]
+
+
+def encode_cursor(timestamp, rank, pk):
+    return base64.urlsafe_b64encode(('%s|%s|%s' % (timestamp.isoformat(), rank, pk)).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Returns the (timestamp, rank, pk) position of a cursor, or raises ValueError.
+    """
+    try:
+        timestamp, rank, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Invalid cursor.')
+    timestamp = parse_datetime(timestamp)
+    if timestamp is None:
+        raise ValueError('Invalid cursor.')
+    return timestamp, int(rank), pk
+
+
+def visible_querysets(user):
+    contributed_projects = Contributor.objects.filter(user=user).values('project_id')
+    visible_issues = Issue.objects.filter(project_id__in=contributed_projects).values('pk')
+    return {
+        'project': Project.objects.filter(Q(author=user) | Q(pk__in=contributed_projects)),
+        'contributor': Contributor.objects.filter(Q(project__author=user) | Q(project_id__in=contributed_projects)),
+        'issue': Issue.objects.filter(Q(author=user) & ~Q(project_id__in=deleted_project_ids()) |
+                                      Q(project_id__in=contributed_projects)),
+        'comment': Comment.objects.filter(Q(author=user) & ~Q(issue__project_id__in=deleted_project_ids()) |
+                                          Q(issue_id__in=visible_issues)),
+        'tombstone': Tombstone.objects.filter(Q(user_id=user.pk) |
+                                              Q(user_id__isnull=True, project_id__in=contributed_projects)),
+    }
+
+
+def after_position(timestamp_field, rank, position):
+    """
+    Keyset condition selecting the rows of a source placed after (timestamp, rank, pk) in the feed.
+    """
+    timestamp, position_rank, pk = position
+    if rank > position_rank:
+        return Q(**{timestamp_field + '__gte': timestamp})
+    if rank < position_rank:
+        return Q(**{timestamp_field + '__gt': timestamp})
+    return Q(**{timestamp_field + '__gt': timestamp}) | Q(**{timestamp_field: timestamp, 'pk__gt': pk})
+
+
+def get_changes(user, position, limit, context):
+    """
+    Returns up to limit changes visible to the user after the position, in (timestamp, source, pk) order,
+    with the position of the last change to resume from.
+    """
+    querysets = visible_querysets(user)
+    changes = []
+    for rank, (name, model, timestamp_field, serializer_class) in enumerate(SOURCES):
+        queryset = querysets[name]
+        if position is not None:
+            queryset = queryset.filter(after_position(timestamp_field, rank, position))
+        for instance in queryset.order_by(timestamp_field, 'pk')[:limit]:
+            changes.append(((getattr(instance, timestamp_field), rank, instance.pk), name, instance, serializer_class))
+    changes.sort(key=lambda change: change[0])
+    changes = changes[:limit]
+    results = []
+    for key, name, instance, serializer_class in changes:
+        if serializer_class is None:
+            results.append({'action': 'delete', 'type': instance.model, 'id': instance.object_id,
+                            'timestamp': instance.deleted_at})
+        else:
+            results.append({'action': 'upsert', 'type': name, 'id': instance.pk,
+                            'timestamp': instance.updated_at,
+                            'data': serializer_class(instance, context=context).data})
+    return results, changes[-1][0] if changes else position
+
+
+def record_deletion(model, pks, project_id, user_ids=None):
+    """
+    Builds the tombstones of deleted instances, one per user when the audience is not the project contributors.
+    """
+    model_name = model._meta.model_name
+    if user_ids is None:
+        return [Tombstone(model=model_name, object_id=str(pk), project_id=project_id) for pk in pks]
+    return [Tombstone(model=model_name, object_id=str(pk), project_id=project_id, user_id=user_id)
+            for pk in pks for user_id in user_ids]
+
+
+def record_moves(moves):
+    """
+    Builds the tombstones of instances moved from a project to another, given as (model, pk, previous project id,
+    project id, author id) tuples. They are addressed to the contributors of the previous project who do not
+    contribute to the new one, the others still seeing the instances along with their update.
+    """
+    moves = [move for move in moves if move[2] != move[3]]
+    if not moves:
+        return []
+    members = defaultdict(set)
+    project_ids = {move[2] for move in moves} | {move[3] for move in moves}
+    for project_id, user_id in Contributor.objects.filter(project_id__in=project_ids) \
+            .values_list('project_id', 'user_id'):
+        members[project_id].add(user_id)
+    tombstones = []
+    for model, pk, previous_project_id, project_id, author_id in moves:
+        user_ids = members[previous_project_id] - members[project_id] - {author_id}
+        tombstones += record_deletion(model, [pk], previous_project_id, sorted(user_ids))
+    return tombstones
+
+
+def record_issue_moves(issues, previous_project_ids):
+    """
+    Builds the tombstones of the issues moved to another project and of their comments,
+    previous_project_ids mapping the pk of every issue to its project before the update.
+    """
+    moved = {issue.pk: issue for issue in issues if issue.project_id != previous_project_ids[issue.pk]}
+    if not moved:
+        return []
+    moves = [(Issue, issue.pk, previous_project_ids[issue.pk], issue.project_id, issue.author_id)
+             for issue in moved.values()]
+    comments = Comment.objects.filter(issue_id__in=moved).values_list('pk', 'issue_id', 'author_id')
+    for pk, issue_id, author_id in comments:
+        moves.append((Comment, pk, previous_project_ids[issue_id], moved[issue_id].project_id, author_id))
+    return record_moves(moves)
+
+
+def record_comment_moves(comments, previous_project_ids):
+    """
+    Builds the tombstones of the comments moved to an issue of another project,
+    previous_project_ids mapping the pk of every comment to its project before the update.
+    """
+    return record_moves([(Comment, comment.pk, previous_project_ids[comment.pk], comment.issue.project_id,
+                          comment.author_id) for comment in comments])
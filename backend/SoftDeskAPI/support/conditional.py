@@ -0,0 +1,155 @@
+import hashlib
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.cache import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .pagination import ordering_columns
+
+
+def make_etag(request, *version):
+    """
+    Returns a weak ETag of the version of a resource, for the representation the request asks for.
+    """
+    digest = hashlib.sha256()
+    for part in (request.get_host(), request.get_full_path(), request.META.get('HTTP_ACCEPT', '')) + version:
+        digest.update(('%s;' % (part,)).encode())
+    return 'W/' + quote_etag(digest.hexdigest()[:32])
+
+
+def opaque_tag(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def etag_matches(request, etag):
+    """
+    Compares the If-None-Match header of the request with an ETag, using the weak comparison.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return '*' in etags or opaque_tag(etag) in map(opaque_tag, etags)
+
+
+def related_columns(relations):
+    return ['%s__updated_at' % name for name in relations]
+
+
+def page_version(rows, pk_name, relations=()):
+    """
+    Returns the version of a page of model instances or .values() rows: its number of rows
+    and a digest of their primary keys and updated_at, and of the updated_at of the given relations.
+    """
+    digest = hashlib.sha256()
+    for row in rows:
+        if isinstance(row, dict):
+            pk, updated_at = row[pk_name], row['updated_at']
+            related = [row[column] for column in related_columns(relations)]
+        else:
+            pk, updated_at = row.pk, row.updated_at
+            related = [getattr(getattr(row, name), 'updated_at', None) for name in relations]
+        digest.update(('%s@%s;' % (pk, '@'.join(map(str, [updated_at] + related)))).encode())
+    return len(rows), digest.hexdigest()
+
+
+class ConditionalResponseMixin:
+    """
+    Adds ETags to the list and retrieve responses of a viewset, and answers 304 Not Modified to a matching
+    If-None-Match without serializing anything. A detail ETag is derived from the updated_at of the row, a list
+    ETag from the primary keys and updated_at of the rows of the page. Without If-None-Match, both come from
+    the rows the response loads anyway; with it, from a single query limited to the row or the page.
+    The versions include the updated_at of the related rows embedded by ?expand=, and the responses embedding
+    rows without an updated_at, such as users, get no ETag.
+    """
+
+    def get_version_relations(self):
+        """
+        Returns the names of the expanded relations, or None when one of them cannot be versioned.
+        """
+        expand = self.get_fieldset()[1] if hasattr(self, 'get_fieldset') else []
+        model = self.queryset.model
+        for name in expand:
+            related_model = model._meta.get_field(name).related_model
+            if 'updated_at' not in {field.name for field in related_model._meta.concrete_fields}:
+                return None
+        return expand
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.action == 'list':
+            relations = self.get_version_relations()
+            self.list_version = page_version(page, queryset.model._meta.pk.attname, relations) \
+                if relations is not None else None
+        return page
+
+    def get_list_version(self):
+        relations = self.get_version_relations()
+        if relations is None:
+            return None
+        queryset = self.filter_queryset(self.get_queryset())
+        # the cursor pagination reads the position of the last row from its ordering column
+        pk_name = queryset.model._meta.pk.attname
+        columns = [pk_name, 'updated_at'] + ordering_columns(self.paginator)
+        queryset = queryset.values(*dict.fromkeys(columns + related_columns(relations)))
+        rows = self.paginate_queryset(queryset)
+        return page_version(rows if rows is not None else list(queryset), pk_name, relations)
+
+    def get_detail_version(self):
+        relations = self.get_version_relations()
+        if relations is None:
+            return None
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        try:
+            return queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}) \
+                .values_list('pk', 'updated_at', *related_columns(relations)).first()
+        except (TypeError, ValueError, DjangoValidationError):
+            return None
+
+    def get_object(self):
+        instance = super().get_object()
+        relations = self.get_version_relations()
+        if relations is not None:
+            self.object_version = (instance.pk, instance.updated_at,
+                                   *[getattr(getattr(instance, name), 'updated_at', None) for name in relations])
+        return instance
+
+    def conditional_response(self, request, version, handler, *args, **kwargs):
+        if version is None:
+            return handler(request, *args, **kwargs)
+        etag = make_etag(request, self.basename, self.action, *version)
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if 'HTTP_IF_NONE_MATCH' in request.META:
+            return self.conditional_response(request, self.get_list_version(), super().list, *args, **kwargs)
+        # without a validator to compare, the version comes from the page the serializer reads anyway,
+        # or from the version query when the response cache answered without paginating
+        self.list_version = None
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            version = self.list_version or self.get_list_version()
+            if version is not None:
+                response['ETag'] = make_etag(request, self.basename, self.action, *version)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        if 'HTTP_IF_NONE_MATCH' in request.META:
+            return self.conditional_response(request, self.get_detail_version(), super().retrieve, *args, **kwargs)
+        # without a validator to compare, the version comes from the row the serializer loads anyway
+        self.object_version = None
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            version = self.object_version or self.get_detail_version()
+            if version is not None:
+                response['ETag'] = make_etag(request, self.basename, self.action, *version)
+        return response
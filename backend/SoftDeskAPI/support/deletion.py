@@ -0,0 +1,123 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .sqlite import write_transaction
+from .models import Project, Contributor, Issue, Comment, ProjectIssueCount, SearchEntry, ProjectDeletion
+
+logger = logging.getLogger(__name__)
+
+
+def deleted_project_ids():
+    """
+    Subquery of the ids of the projects marked as deleted, to hide the rows still pointing to them.
+    """
+    return Project.all_objects.filter(deleted_at__isnull=False).values('pk')
+
+
+def mark_project_deleted(project, user):
+    """
+    Hides a project at once and queues the removal of its rows. Its contributors are removed immediately,
+    which revokes every access through membership. Returns the ProjectDeletion tracking the progress.
+    """
+    Project.all_objects.filter(pk=project.pk).update(deleted_at=timezone.now())
+    Contributor.objects.filter(project=project).delete()
+    return ProjectDeletion.objects.create(
+        project_id=project.pk, author=user,
+        total_issues=Issue.objects.filter(project=project).count(),
+        total_comments=Comment.objects.filter(issue__project=project).count())
+
+
+def delete_in_batches(queryset, batch_size, progress_field=None, deletion=None):
+    """
+    Deletes the rows of the queryset by batches of primary keys, each in its own transaction,
+    with raw DELETE statements that skip the collector. Returns the number of deleted rows.
+    """
+    model = queryset.model
+    total = 0
+    while True:
+        with write_transaction():
+            pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return total
+            deleted = model._base_manager.filter(pk__in=pks)._raw_delete(model._base_manager.db)
+            if progress_field:
+                ProjectDeletion.objects.filter(pk=deletion.pk).update(**{progress_field: F(progress_field) + deleted})
+        total += deleted
+
+
+def purge_project(deletion, batch_size=None):
+    """
+    Removes the search entries, comments, issues and counters of a project marked as deleted, then the project.
+    Resumes where it stopped when interrupted.
+    """
+    batch_size = batch_size or getattr(settings, 'SUPPORT_DELETION_BATCH_SIZE', 1000)
+    project_id = deletion.project_id
+    delete_in_batches(SearchEntry.objects.filter(project_id=project_id), batch_size)
+    delete_in_batches(Comment.objects.filter(issue__project_id=project_id), batch_size, 'deleted_comments', deletion)
+    delete_in_batches(Issue.objects.filter(project_id=project_id), batch_size, 'deleted_issues', deletion)
+    with write_transaction():
+        ProjectIssueCount.objects.filter(project_id=project_id)._raw_delete(ProjectIssueCount.objects.db)
+        Contributor.objects.filter(project_id=project_id)._raw_delete(Contributor.objects.db)
+        Project.all_objects.filter(pk=project_id)._raw_delete(Project.all_objects.db)
+        ProjectDeletion.objects.filter(pk=deletion.pk).update(finished_at=timezone.now())
+
+
+def purge_deleted_projects(batch_size=None):
+    """
+    Runs every pending project deletion, oldest first. Returns the number of purged projects.
+    """
+    purged = 0
+    for deletion in ProjectDeletion.objects.filter(finished_at__isnull=True).order_by('requested_at', 'pk'):
+        purge_project(deletion, batch_size)
+        purged += 1
+    return purged
+
+
+class DeletionWorker:
+    """
+    Background thread of the web process running the pending project deletions, one at most per process.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pending = False
+
+    def start(self):
+        with self.lock:
+            self.pending = True
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='support-deletion-worker', daemon=True)
+                self.thread.start()
+
+    def run(self):
+        try:
+            while True:
+                with self.lock:
+                    if not self.pending:
+                        self.thread = None
+                        return
+                    self.pending = False
+                try:
+                    purge_deleted_projects()
+                except Exception:
+                    logger.exception('Project deletion failed, run purge_deleted_projects to resume it.')
+        finally:
+            connections.close_all()
+
+
+worker = DeletionWorker()
+
+
+def schedule_purge():
+    """
+    Starts the deletion worker once the current transaction commits, unless SUPPORT_DELETION_WORKER is False
+    and the deletions are left to the purge_deleted_projects command.
+    """
+    if getattr(settings, 'SUPPORT_DELETION_WORKER', True):
+        transaction.on_commit(worker.start)
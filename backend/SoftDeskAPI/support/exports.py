@@ -0,0 +1,50 @@
+import csv
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from .serializers import IssueSerializer, CommentSerializer
+
+CSV_COLUMNS = ['record', 'id', 'project', 'issue', 'author', 'description', 'time_created',
+               'affected_to', 'status', 'priority', 'tag', 'url']
+
+
+class Echo:
+    """
+    A file-like object whose write returns the value instead of storing it, for csv.writer.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_issues_with_comments(issues, comments, context, chunk_size):
+    """
+    Yields (issue, comments) pairs of serialized data, merging two server-side iterators
+    ordered by issue id, so only one issue and its comments are held in memory at a time.
+    """
+    comments = iter(comments.order_by('issue_id', 'time_created').iterator(chunk_size=chunk_size))
+    comment = next(comments, None)
+    for issue in issues.order_by('pk').iterator(chunk_size=chunk_size):
+        while comment is not None and comment.issue_id < issue.pk:
+            comment = next(comments, None)
+        issue_comments = []
+        while comment is not None and comment.issue_id == issue.pk:
+            issue_comments.append(CommentSerializer(comment, context=context).data)
+            comment = next(comments, None)
+        yield IssueSerializer(issue, context=context).data, issue_comments
+
+
+def export_ndjson(issues, comments, context, chunk_size):
+    encoder = JSONEncoder(ensure_ascii=False)
+    for issue, issue_comments in iter_issues_with_comments(issues, comments, context, chunk_size):
+        issue['comments'] = issue_comments
+        yield encoder.encode(issue) + '\n'
+
+
+def export_csv(issues, comments, context, chunk_size):
+    writer = csv.DictWriter(Echo(), fieldnames=CSV_COLUMNS, extrasaction='ignore')
+    yield writer.writerow(dict(zip(CSV_COLUMNS, CSV_COLUMNS)))
+    for issue, issue_comments in iter_issues_with_comments(issues, comments, context, chunk_size):
+        yield writer.writerow(dict(issue, record='issue', issue=issue['id']))
+        for comment in issue_comments:
+            yield writer.writerow(dict(comment, record='comment', project=issue['project']))
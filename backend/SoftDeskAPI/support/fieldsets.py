@@ -0,0 +1,60 @@
+from rest_framework.exceptions import ValidationError
+
+
+def parse_names(request, param):
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class SparseFieldsetMixin:
+    """
+    Lets the list and retrieve actions return a subset of the fields (?fields=id,description) and embed
+    related objects (?expand=author,project). Only the columns of the requested fields are selected,
+    and the expanded relations are joined in the same query.
+    """
+    # model fields loaded whatever the requested fields, for the ordering, the ETags and the permissions
+    fieldset_required_fields = ['author', 'time_created', 'updated_at']
+
+    def get_fieldset(self):
+        """
+        Returns the requested field names, or None for all of them, and the names of the fields to expand.
+        """
+        if self.action not in ['list', 'retrieve']:
+            return None, []
+        fieldset = getattr(self, '_fieldset', None)
+        if fieldset is None:
+            meta = self.get_serializer_class().Meta
+            fields, expand = parse_names(self.request, 'fields'), parse_names(self.request, 'expand') or []
+            unknown_fields = sorted(set(fields or []) - set(meta.fields))
+            if unknown_fields:
+                raise ValidationError({'fields': 'Unknown fields: %s.' % ', '.join(unknown_fields)})
+            unknown_expand = sorted(set(expand) - set(meta.expandable_fields))
+            if unknown_expand:
+                raise ValidationError({'expand': 'Fields that cannot be expanded: %s.' % ', '.join(unknown_expand)})
+            if fields is not None:
+                expand = [field_name for field_name in expand if field_name in fields]
+            fieldset = self._fieldset = (fields, expand)
+        return fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        fields, expand = self.get_fieldset()
+        if fields is not None:
+            kwargs['fields'] = fields
+        if expand:
+            kwargs['expand'] = expand
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields, expand = self.get_fieldset()
+        if expand:
+            queryset = queryset.select_related(*expand)
+        if fields is not None:
+            model_fields = {field.name for field in queryset.model._meta.concrete_fields}
+            loaded = set(fields + expand + self.fieldset_required_fields)
+            if isinstance(queryset.query.select_related, dict):
+                loaded.update(queryset.query.select_related)
+            queryset = queryset.only(queryset.model._meta.pk.name, *(loaded & model_fields))
+        return queryset
@@ -0,0 +1,28 @@
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last = [0, 0]
+
+
+def uuid7():
+    """
+    Returns a time-ordered UUID in the version 7 layout of RFC 9562: 48 bits of Unix time in milliseconds,
+    a 12 bits counter keeping the ids of a same millisecond increasing within the process, and 62 random bits.
+    New rows are appended at the end of the primary key index instead of landing at random positions.
+    """
+    with _lock:
+        timestamp = time.time_ns() // 1000000
+        if timestamp > _last[0]:
+            _last[0], _last[1] = timestamp, int.from_bytes(os.urandom(2), 'big') & 0x7ff
+        else:
+            # same millisecond, or the clock went back: keep counting from the last id
+            _last[1] += 1
+            if _last[1] > 0xfff:
+                _last[0], _last[1] = _last[0] + 1, 0
+            timestamp = _last[0]
+        counter = _last[1]
+    random_bits = int.from_bytes(os.urandom(8), 'big') & 0x3fffffffffffffff
+    return uuid.UUID(int=timestamp << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | random_bits)
@@ -0,0 +1,125 @@
+import json
+import logging
+import threading
+from collections import deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('support.instrumentation')
+
+current_metrics = ContextVar('support_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Query count and time spent in the database and in serializers during one request.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += perf_counter() - start
+
+
+class RouteHistograms:
+    """
+    Keeps the timings of the last requests of every route, to compute percentiles on demand.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def record(self, route, sample):
+        with self.lock:
+            window = self.routes.get(route)
+            if window is None:
+                window = self.routes[route] = deque(maxlen=getattr(settings, 'SUPPORT_INSTRUMENTATION_WINDOW', 1000))
+        window.append(sample)
+
+    def summary(self):
+        with self.lock:
+            routes = {route: list(window) for route, window in self.routes.items()}
+        return {route: summarize(samples) for route, samples in sorted(routes.items())}
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def summarize(samples):
+    data = {'count': len(samples)}
+    for index, name in enumerate(['view_ms', 'db_ms', 'serializer_ms', 'queries']):
+        values = sorted(sample[index] for sample in samples)
+        data[name] = {'p50': round(percentile(values, 0.5), 2), 'p95': round(percentile(values, 0.95), 2),
+                      'p99': round(percentile(values, 0.99), 2), 'max': round(values[-1], 2)}
+    return data
+
+
+histograms = RouteHistograms()
+
+
+class InstrumentationMiddleware:
+    """
+    Measures the queries, database time, serializer time and view time of every request when
+    SUPPORT_INSTRUMENTATION is set, and reports them as Server-Timing headers, a log line and route histograms.
+    Removes itself from the middleware chain otherwise.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SUPPORT_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.record_query))
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        view_ms = (perf_counter() - start) * 1000
+        db_ms, serializer_ms = metrics.db_time * 1000, metrics.serializer_time * 1000
+        response['Server-Timing'] = 'db;dur=%.2f;desc="%s queries", serializer;dur=%.2f, view;dur=%.2f' % \
+                                    (db_ms, metrics.queries, serializer_ms, view_ms)
+        resolver_match = getattr(request, 'resolver_match', None)
+        route = '%s %s' % (request.method, resolver_match.view_name if resolver_match else 'unresolved')
+        histograms.record(route, (view_ms, db_ms, serializer_ms, metrics.queries))
+        logger.info(json.dumps({'route': route, 'path': request.path, 'status': response.status_code,
+                                'queries': metrics.queries, 'db_ms': round(db_ms, 2),
+                                'serializer_ms': round(serializer_ms, 2), 'view_ms': round(view_ms, 2)}))
+        return response
+
+
+class InstrumentedSerializerMixin:
+    """
+    Adds the time spent building the data of a top-level serializer to the current request metrics.
+    """
+
+    @property
+    def data(self):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return super().data
+        start = perf_counter()
+        try:
+            return super().data
+        finally:
+            metrics.serializer_time += perf_counter() - start
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from support.deletion import purge_deleted_projects
+
+
+class Command(BaseCommand):
+    help = 'Removes the issues, comments and counters of the projects marked as deleted, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Rows removed per transaction, '
+                                                           'SUPPORT_DELETION_BATCH_SIZE by default.')
+
+    def handle(self, *args, **options):
+        purged = purge_deleted_projects(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Purged %s projects.' % purged))
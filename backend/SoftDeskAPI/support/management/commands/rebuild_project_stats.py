@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from support.stats import rebuild_issue_counts
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the per-project issue counters by status, priority and tag.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('projects', nargs='*', type=int, help='Ids of the projects to rebuild, all by default.')
+
+    def handle(self, *args, **options):
+        rows = rebuild_issue_counts(options['projects'] or None)
+        self.stdout.write(self.style.SUCCESS('Rebuilt %s issue counters.' % rows))
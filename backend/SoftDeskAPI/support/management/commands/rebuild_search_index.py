@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from support.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Recreates the full-text search index of issue and comment descriptions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows read and written per batch.')
+
+    def handle(self, *args, **options):
+        entries = rebuild_search_index(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS('Indexed %s issues and comments.' % entries))
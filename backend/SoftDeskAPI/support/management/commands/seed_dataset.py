@@ -0,0 +1,82 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from support.models import User, Project, Contributor, Issue, Comment
+from support.search import rebuild_search_index
+from support.stats import rebuild_issue_counts
+
+
+def skewed_weights(count, skew):
+    """
+    Zipf-like weights, the first items being the most popular; a skew of 0 spreads evenly.
+    """
+    return [1 / (rank + 1) ** skew for rank in range(count)]
+
+
+class Command(BaseCommand):
+    help = 'Generates users, projects, contributors, issues and comments for performance testing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--projects', type=int, default=50)
+        parser.add_argument('--contributors', type=int, default=5, help='Contributors per project, author included.')
+        parser.add_argument('--issues', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--skew', type=float, default=1.0,
+                            help='Concentration of projects, issues and comments on a few users and projects.')
+        parser.add_argument('--prefix', default='seed', help='Prefix of the generated usernames.')
+        parser.add_argument('--password', default='seed-password', help='Password of the generated users.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible datasets.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        skew = options['skew']
+        offset = User.objects.filter(username__startswith=options['prefix']).count()
+        password = make_password(options['password'])
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(username='%s%s' % (options['prefix'], offset + index), password=password,
+                     email='%s%s@example.com' % (options['prefix'], offset + index), age=rng.randint(15, 99))
+                for index in range(options['users'])])
+            user_weights = skewed_weights(len(users), skew)
+            projects = Project.objects.bulk_create([
+                Project(author=author, title='Project %s' % index, description='Seeded project %s' % index,
+                        type=rng.choice(Project.TYPE_CHOICES)[0])
+                for index, author in enumerate(rng.choices(users, user_weights, k=options['projects']))])
+            members, contributors = {}, []
+            for project in projects:
+                members[project.pk] = {project.author}
+                while len(members[project.pk]) < min(options['contributors'], len(users)):
+                    members[project.pk].add(rng.choices(users, user_weights)[0])
+                contributors += [Contributor(user=user, project=project) for user in members[project.pk]]
+            Contributor.objects.bulk_create(contributors, batch_size=1000)
+            issues = []
+            for index, project in enumerate(rng.choices(projects, skewed_weights(len(projects), skew),
+                                                        k=options['issues'])):
+                project_members = sorted(members[project.pk], key=lambda user: user.pk)
+                author, affected_to = rng.choice(project_members), rng.choice(project_members)
+                issues.append(Issue(project=project, author=author, affected_to=affected_to,
+                                    description='Seeded issue %s about %s' % (index, rng.choice(WORDS)),
+                                    status=rng.choice(Issue.STATUS_CHOICES)[0],
+                                    priority=rng.choice(Issue.PRIORITY_CHOICES)[0],
+                                    tag=rng.choice(Issue.TAG_CHOICES)[0]))
+            issues = Issue.objects.bulk_create(issues, batch_size=1000)
+            comments = []
+            for index, issue in enumerate(rng.choices(issues, skewed_weights(len(issues), skew),
+                                                      k=options['comments'])):
+                author = rng.choice(sorted(members[issue.project_id], key=lambda user: user.pk))
+                comments.append(Comment(issue=issue, author=author,
+                                        description='Seeded comment %s on %s' % (index, rng.choice(WORDS))))
+            Comment.objects.bulk_create(comments, batch_size=1000)
+        rebuild_issue_counts([project.pk for project in projects])
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(
+            'Created %s users, %s projects, %s contributors, %s issues and %s comments.' %
+            (len(users), len(projects), len(contributors), len(issues), len(comments))))
+
+
+WORDS = ['login', 'checkout', 'payment', 'search', 'upload', 'export', 'notification', 'profile',
+         'dashboard', 'session', 'timeout', 'crash', 'layout', 'translation', 'permission', 'cache']
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from support.routers import get_replicas
+
+
+class Command(BaseCommand):
+    help = 'Copies the primary SQLite database to the SUPPORT_DATABASE_REPLICAS, to try the replica routing locally.'
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        replicas = get_replicas()
+        if not replicas:
+            raise CommandError('SUPPORT_DATABASE_REPLICAS is empty.')
+        if primary.vendor != 'sqlite' or any(connections[alias].vendor != 'sqlite' for alias in replicas):
+            raise CommandError('Only SQLite databases can be copied, use the replication of the database server.')
+        primary.ensure_connection()
+        for alias in replicas:
+            replica = connections[alias]
+            replica.ensure_connection()
+            primary.connection.backup(replica.connection)
+            self.stdout.write(self.style.SUCCESS('Copied %s to %s.' % (DEFAULT_DB_ALIAS, alias)))
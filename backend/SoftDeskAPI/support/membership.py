@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import User, Contributor
+
+CACHE_KEY = 'support:membership:%s'
+PROJECT_ADMIN_KEY = 'support:membership:project-admin:%s'
+
+
+def get_member_project_ids(request):
+    """
+    Returns the set of project ids the request user contributes to.
+    Loaded once per request, and shared between requests through the cache
+    for SUPPORT_MEMBERSHIP_CACHE_TTL seconds when it is set.
+    """
+    project_ids = getattr(request, '_member_project_ids', None)
+    if project_ids is not None:
+        return project_ids
+    user = request.user
+    timeout = getattr(settings, 'SUPPORT_MEMBERSHIP_CACHE_TTL', 30)
+    if timeout:
+        project_ids = cache.get(CACHE_KEY % user.pk)
+    if project_ids is None:
+        project_ids = frozenset(Contributor.objects.filter(user=user).values_list('project_id', flat=True))
+        if timeout:
+            cache.set(CACHE_KEY % user.pk, project_ids, timeout)
+    request._member_project_ids = project_ids
+    return project_ids
+
+
+def invalidate_membership(*user_ids):
+    """
+    Drops the cached project ids of the given users, after their contributor rows changed.
+    """
+    cache.delete_many([CACHE_KEY % user_id for user_id in user_ids])
+
+
+def get_project_id(obj):
+    """
+    Returns the id of the project a project, issue or comment instance belongs to.
+    """
+    if hasattr(obj, 'contributor_set'):
+        return obj.pk
+    if hasattr(obj, 'project_id'):
+        return obj.project_id
+    return obj.issue.project_id
+
+
+def get_project_admin_id():
+    """
+    Returns the id of the user added as a contributor to every new project, None when SUPPORT_PROJECT_ADMIN_ID
+    is None or names no user. Whether the user exists is cached for SUPPORT_MEMBERSHIP_CACHE_TTL seconds.
+    """
+    admin_id = getattr(settings, 'SUPPORT_PROJECT_ADMIN_ID', 1)
+    if admin_id is None:
+        return None
+    key = PROJECT_ADMIN_KEY % admin_id
+    timeout = getattr(settings, 'SUPPORT_MEMBERSHIP_CACHE_TTL', 30)
+    exists = cache.get(key) if timeout else None
+    if exists is None:
+        exists = User.objects.filter(pk=admin_id).exists()
+        if timeout:
+            cache.set(key, exists, timeout)
+    return admin_id if exists else None
+
+
+def invalidate_project_admin(user_id):
+    cache.delete(PROJECT_ADMIN_KEY % user_id)
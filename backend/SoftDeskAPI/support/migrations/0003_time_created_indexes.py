@@ -0,0 +1,25 @@
+# Generated by Django 4.0.10 on 2026-10-17 23:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0002_alter_user_can_be_contacted_alter_user_can_be_shared'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['-time_created', '-id'], name='comment_time_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['-time_created', '-id'], name='issue_time_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-time_created', '-id'], name='project_time_created_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.0.10 on 2026-10-17 23:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def count_existing_issues(apps, schema_editor):
+    Issue = apps.get_model('support', 'Issue')
+    ProjectIssueCount = apps.get_model('support', 'ProjectIssueCount')
+    rows = []
+    for dimension in ['status', 'priority', 'tag']:
+        for row in Issue.objects.order_by().values('project_id', dimension).annotate(count=models.Count('pk')):
+            rows.append(ProjectIssueCount(project_id=row['project_id'], dimension=dimension,
+                                          value=row[dimension], count=row['count']))
+    ProjectIssueCount.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0003_time_created_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectIssueCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('status', 'Status'), ('priority', 'Priority'), ('tag', 'Tag')], max_length=16)),
+                ('value', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='support.project')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='projectissuecount',
+            constraint=models.UniqueConstraint(fields=('project', 'dimension', 'value'), name='unique_project_issue_count'),
+        ),
+        migrations.RunPython(count_existing_issues, migrations.RunPython.noop),
+    ]
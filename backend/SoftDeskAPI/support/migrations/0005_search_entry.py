@@ -0,0 +1,81 @@
+# Generated by Django 4.0.10 on 2026-10-17 23:46
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+import django.db.models.deletion
+
+SQLITE_CREATE_STATEMENTS = [
+    "CREATE VIRTUAL TABLE support_searchentry_fts USING fts5("
+    "body, content='support_searchentry', content_rowid='id')",
+    "CREATE TRIGGER support_searchentry_fts_insert AFTER INSERT ON support_searchentry BEGIN "
+    "INSERT INTO support_searchentry_fts(rowid, body) VALUES (new.id, new.body); END",
+    "CREATE TRIGGER support_searchentry_fts_delete AFTER DELETE ON support_searchentry BEGIN "
+    "INSERT INTO support_searchentry_fts(support_searchentry_fts, rowid, body) VALUES ('delete', old.id, old.body); END",
+    "CREATE TRIGGER support_searchentry_fts_update AFTER UPDATE OF body ON support_searchentry BEGIN "
+    "INSERT INTO support_searchentry_fts(support_searchentry_fts, rowid, body) VALUES ('delete', old.id, old.body); "
+    "INSERT INTO support_searchentry_fts(rowid, body) VALUES (new.id, new.body); END",
+]
+SQLITE_DROP_STATEMENTS = [
+    "DROP TRIGGER IF EXISTS support_searchentry_fts_insert",
+    "DROP TRIGGER IF EXISTS support_searchentry_fts_delete",
+    "DROP TRIGGER IF EXISTS support_searchentry_fts_update",
+    "DROP TABLE IF EXISTS support_searchentry_fts",
+]
+POSTGRESQL_CREATE_STATEMENTS = [
+    "CREATE INDEX support_searchentry_body_fts ON support_searchentry USING GIN (to_tsvector('english', body))",
+]
+POSTGRESQL_DROP_STATEMENTS = [
+    "DROP INDEX IF EXISTS support_searchentry_body_fts",
+]
+
+
+def create_search_index(apps, schema_editor, chunk_size=500):
+    statements = {'sqlite': SQLITE_CREATE_STATEMENTS, 'postgresql': POSTGRESQL_CREATE_STATEMENTS}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+    Issue = apps.get_model('support', 'Issue')
+    Comment = apps.get_model('support', 'Comment')
+    SearchEntry = apps.get_model('support', 'SearchEntry')
+    # streamed in chunks as rebuild_search_index does, without holding every issue and comment in memory
+    sources = [
+        Issue.objects.values('project_id', 'author_id', issue_id=F('pk'), body=F('description')),
+        Comment.objects.values('issue_id', 'author_id', comment_id=F('pk'), project_id=F('issue__project_id'),
+                               body=F('description')),
+    ]
+    for queryset in sources:
+        batch = []
+        for row in queryset.iterator(chunk_size=chunk_size):
+            batch.append(SearchEntry(**row))
+            if len(batch) == chunk_size:
+                SearchEntry.objects.bulk_create(batch)
+                batch = []
+        SearchEntry.objects.bulk_create(batch)
+
+
+def drop_search_index(apps, schema_editor):
+    statements = {'sqlite': SQLITE_DROP_STATEMENTS, 'postgresql': POSTGRESQL_DROP_STATEMENTS}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0004_project_issue_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('body', models.TextField(blank=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('comment', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, to='support.comment')),
+                ('issue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='support.issue')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='support.project')),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
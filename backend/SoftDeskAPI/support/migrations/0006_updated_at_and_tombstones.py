@@ -0,0 +1,70 @@
+# Generated by Django 4.0.10 on 2026-10-17 23:47
+
+from django.db import migrations, models
+
+
+def initialize_updated_at(apps, schema_editor):
+    for model_name in ['Project', 'Issue', 'Comment']:
+        apps.get_model('support', model_name).objects.update(updated_at=models.F('time_created'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0005_search_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=16)),
+                ('object_id', models.CharField(max_length=36)),
+                ('project_id', models.BigIntegerField()),
+                ('user_id', models.BigIntegerField(null=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='contributor',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(initialize_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['updated_at', 'id'], name='comment_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contributor',
+            index=models.Index(fields=['updated_at', 'id'], name='contributor_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['updated_at', 'id'], name='issue_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['updated_at', 'id'], name='project_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_at_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.0.10 on 2026-10-17 23:59
+
+from django.db import migrations, models
+
+
+def remove_duplicate_contributors(apps, schema_editor):
+    # keeps the oldest row of every (user, project) pair before the unique constraint is added
+    Contributor = apps.get_model('support', 'Contributor')
+    duplicates = Contributor.objects.values('user_id', 'project_id') \
+        .annotate(first_pk=models.Min('pk'), rows=models.Count('pk')).filter(rows__gt=1)
+    for duplicate in duplicates:
+        Contributor.objects.filter(user_id=duplicate['user_id'], project_id=duplicate['project_id']) \
+            .exclude(pk=duplicate['first_pk']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0007_project_deletion'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_contributors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['affected_to', 'status', 'priority', '-time_created'],
+                               name='issue_affected_to_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', 'status', 'priority'], name='issue_project_status_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='contributor',
+            constraint=models.UniqueConstraint(fields=('user', 'project'), name='unique_contributor'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.10 on 2026-10-18 00:00
+
+from django.db import migrations, models
+import support.ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0008_contributor_unique_and_issue_indexes'),
+    ]
+
+    # only the Python default of the primary key changes: the table is not rebuilt and the existing ids are kept
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='comment',
+                name='id',
+                field=models.UUIDField(default=support.ids.uuid7, editable=False, primary_key=True, serialize=False,
+                                       unique=True),
+            ),
+        ]),
+    ]
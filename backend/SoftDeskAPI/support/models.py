@@ -1,8 +1,9 @@
-import uuid
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from .ids import uuid7
+
 
 # Create your models here.
 class User(AbstractUser):
@@ -12,6 +13,15 @@ class User(AbstractUser):
     REQUIRED_FIELDS = ['email', 'age']
 
 
+class LiveProjectManager(models.Manager):
+    """
+    Hides the projects marked as deleted, whose rows the deletion worker has not removed yet.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Project(models.Model):
     author = models.ForeignKey(to=User, on_delete=models.CASCADE)
     time_created = models.DateTimeField(auto_now_add=True)
@@ -26,11 +36,25 @@ class Project(models.Model):
                     (IOS, 'iOS'),
                     (ANDROID, 'Android'),)
     type = models.IntegerField(choices=TYPE_CHOICES, default=BACKEND)
+    updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = LiveProjectManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['-time_created', '-id'], name='project_time_created_idx'),
+                   models.Index(fields=['updated_at', 'id'], name='project_updated_at_idx')]
 
 
 class Contributor(models.Model):
     user = models.ForeignKey(to=User, on_delete=models.CASCADE)
     project = models.ForeignKey(to=Project, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['updated_at', 'id'], name='contributor_updated_at_idx')]
+        constraints = [models.UniqueConstraint(fields=['user', 'project'], name='unique_contributor')]
 
 
 class Issue(models.Model):
@@ -60,11 +84,19 @@ class Issue(models.Model):
                    (FEATURE, 'Feature'),
                    (TASK, 'Task'),)
     tag = models.IntegerField(choices=TAG_CHOICES, default=BUG)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['-time_created', '-id'], name='issue_time_created_idx'),
+                   models.Index(fields=['updated_at', 'id'], name='issue_updated_at_idx'),
+                   models.Index(fields=['affected_to', 'status', 'priority', '-time_created'],
+                                name='issue_affected_to_idx'),
+                   models.Index(fields=['project', 'status', 'priority'], name='issue_project_status_idx')]
 
 
 class Comment(models.Model):
     id = models.UUIDField(
-        default=uuid.uuid4,
+        default=uuid7,
         unique=True,
         primary_key=True,
         editable=False
@@ -73,3 +105,68 @@ class Comment(models.Model):
     author = models.ForeignKey(to=User, on_delete=models.CASCADE)
     description = models.CharField(max_length=8192, blank=True)
     time_created = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['-time_created', '-id'], name='comment_time_created_idx'),
+                   models.Index(fields=['updated_at', 'id'], name='comment_updated_at_idx')]
+
+
+class ProjectIssueCount(models.Model):
+    """
+    Number of issues of a project having a given status, priority or tag, maintained incrementally.
+    """
+    project = models.ForeignKey(to=Project, on_delete=models.CASCADE)
+    STATUS = 'status'
+    PRIORITY = 'priority'
+    TAG = 'tag'
+    DIMENSION_CHOICES = ((STATUS, 'Status'),
+                         (PRIORITY, 'Priority'),
+                         (TAG, 'Tag'),)
+    dimension = models.CharField(max_length=16, choices=DIMENSION_CHOICES)
+    value = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['project', 'dimension', 'value'],
+                                               name='unique_project_issue_count')]
+
+
+class SearchEntry(models.Model):
+    """
+    Searchable text of an issue (comment is empty) or of a comment, indexed by the full-text search table.
+    """
+    issue = models.ForeignKey(to=Issue, on_delete=models.CASCADE)
+    comment = models.OneToOneField(to=Comment, on_delete=models.CASCADE, null=True)
+    project = models.ForeignKey(to=Project, on_delete=models.CASCADE)
+    author = models.ForeignKey(to=User, on_delete=models.CASCADE)
+    body = models.TextField(blank=True)
+
+
+class Tombstone(models.Model):
+    """
+    Records the deletion of a project, contributor, issue or comment for the change feed.
+    It is visible to the contributors of the project, or only to the given user when one is set.
+    """
+    model = models.CharField(max_length=16)
+    object_id = models.CharField(max_length=36)
+    project_id = models.BigIntegerField()
+    user_id = models.BigIntegerField(null=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_at_idx')]
+
+
+class ProjectDeletion(models.Model):
+    """
+    A project marked as deleted, with the progress of the worker removing its issues and comments in batches.
+    """
+    project_id = models.BigIntegerField(unique=True)
+    author = models.ForeignKey(to=User, on_delete=models.CASCADE)
+    requested_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    total_issues = models.IntegerField(default=0)
+    deleted_issues = models.IntegerField(default=0)
+    total_comments = models.IntegerField(default=0)
+    deleted_comments = models.IntegerField(default=0)
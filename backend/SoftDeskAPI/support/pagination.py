@@ -0,0 +1,23 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+def ordering_columns(paginator):
+    """
+    Returns the columns the ordering of a paginator reads, without their direction and the pk alias,
+    which the cursor pagination needs to locate the last row of a page.
+    """
+    ordering = getattr(paginator, 'ordering', None) or ()
+    if isinstance(ordering, str):
+        ordering = [ordering]
+    return [field.lstrip('-') for field in ordering if field.lstrip('-') != 'pk']
+
+
+class TimeCreatedCursorPagination(CursorPagination):
+    """
+    Keyset pagination on (time_created, pk), newest first.
+    Each page seeks from the cursor position instead of counting and skipping the previous rows.
+    """
+    ordering = ('-time_created', '-pk')
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'SUPPORT_MAX_PAGE_SIZE', 100)
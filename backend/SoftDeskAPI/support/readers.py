@@ -0,0 +1,183 @@
+import datetime
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.urls import NoReverseMatch
+from rest_framework import ISO_8601, serializers
+from rest_framework.relations import PKOnlyObject
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .instrumentation import current_metrics
+from .pagination import ordering_columns
+
+URL_SENTINEL = 'support0url0sentinel'
+
+# serializer fields whose to_representation only converts the type of a column value
+TYPE_CONVERTERS = {
+    serializers.IntegerField: int,
+    serializers.CharField: str,
+    serializers.EmailField: str,
+    serializers.BooleanField: bool,
+    serializers.ReadOnlyField: None,
+}
+
+
+def choice_converter(field):
+    choices = field.choice_strings_to_values
+
+    def convert(value):
+        return value if value == '' else choices.get(str(value), value)
+    return convert
+
+
+def datetime_converter(field):
+    """
+    Formats the UTC datetimes of the database directly when the field outputs ISO 8601 in UTC,
+    and lets the field format the others.
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or \
+            str(field_timezone) not in ['UTC', 'Etc/UTC']:
+        return field.to_representation
+    utc = datetime.timezone.utc
+
+    def convert(value):
+        if value.tzinfo is utc:
+            return value.isoformat()[:-6] + 'Z'
+        return field.to_representation(value)
+    return convert
+
+
+def url_converter(field):
+    """
+    Reverses the detail URL once with a placeholder primary key, then only substitutes the keys of the rows.
+    """
+    try:
+        url = str(field.to_representation(PKOnlyObject(pk=URL_SENTINEL)))
+    except NoReverseMatch:
+        return None
+    if url.count(URL_SENTINEL) != 1 or getattr(field, 'lookup_field', 'pk') != 'pk':
+        return None
+    prefix, suffix = url.split(URL_SENTINEL)
+
+    def convert(value):
+        return prefix + str(value) + suffix
+    return convert
+
+
+def compile_field(field, model):
+    """
+    Returns the column a readable serializer field reads and the function converting its values,
+    or None when the field needs the model instance.
+    """
+    if isinstance(field, serializers.HyperlinkedIdentityField):
+        convert = url_converter(field)
+        return (model._meta.pk.attname, convert) if convert is not None else None
+    if '.' in field.source or field.source == '*':
+        return None
+    try:
+        model_field = model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
+    if not model_field.concrete or model_field.many_to_many:
+        return None
+    if type(field) is serializers.PrimaryKeyRelatedField and field.pk_field is None:
+        return model_field.attname, None
+    if model_field.is_relation:
+        return None
+    if type(field) is serializers.ChoiceField:
+        return model_field.attname, choice_converter(field)
+    if type(field) is serializers.DateTimeField:
+        return model_field.attname, datetime_converter(field)
+    if type(field) is serializers.UUIDField and field.uuid_format == 'hex_verbose':
+        return model_field.attname, str
+    if type(field) in TYPE_CONVERTERS:
+        return model_field.attname, TYPE_CONVERTERS[type(field)]
+    return None
+
+
+class RowReader:
+    """
+    Outputs the representation of a model serializer from rows of column values, with one converter per field
+    compiled beforehand, instead of going through the serializer fields for every row.
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.columns = list(dict.fromkeys(column for name, column, convert in fields))
+
+    @classmethod
+    def compile(cls, serializer):
+        """
+        Returns the reader of a serializer, or None when one of its fields cannot be read from a row,
+        such as the nested serializers of the expanded fields.
+        """
+        model = serializer.Meta.model
+        fields = []
+        for field in serializer._readable_fields:
+            compiled = compile_field(field, model)
+            if compiled is None:
+                return None
+            fields.append((field.field_name, *compiled))
+        return cls(fields)
+
+    def to_representation(self, row):
+        data = {}
+        for name, column, convert in self.fields:
+            value = row[column]
+            data[name] = value if value is None or convert is None else convert(value)
+        return data
+
+    def instance_row(self, instance):
+        return {column: getattr(instance, column) for column in self.columns}
+
+    def data(self, rows):
+        metrics = current_metrics.get()
+        start = perf_counter()
+        try:
+            return [self.to_representation(row) for row in rows]
+        finally:
+            if metrics is not None:
+                metrics.serializer_time += perf_counter() - start
+
+
+class RowReadMixin:
+    """
+    Serves the list and retrieve actions of a viewset from .values() rows through a RowReader when
+    SUPPORT_ROW_READS is set, with the same output as the serializer. Falls back to the serializer for the
+    expanded fields and any field a row cannot provide.
+    """
+
+    def get_row_reader(self):
+        if not getattr(settings, 'SUPPORT_ROW_READS', True) or self.action not in ['list', 'retrieve']:
+            return None
+        return RowReader.compile(self.get_serializer())
+
+    def get_row_columns(self, reader, model):
+        # the primary key keeps the rows distinct, the cursor pagination reads the position of the last row
+        # from its ordering column, and the ETags read the required fields
+        ordering = ordering_columns(self.paginator)
+        required = [model._meta.get_field(name).attname for name in getattr(self, 'fieldset_required_fields', [])]
+        return list(dict.fromkeys([model._meta.pk.attname] + reader.columns + ordering + required))
+
+    def list(self, request, *args, **kwargs):
+        reader = self.get_row_reader()
+        if reader is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(*self.get_row_columns(reader, queryset.model))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(reader.data(page))
+        return Response(reader.data(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        reader = self.get_row_reader()
+        if reader is None:
+            return super().retrieve(request, *args, **kwargs)
+        # the object permissions are checked on the instance, whose columns are already loaded
+        instance = self.get_object()
+        return Response(reader.data([reader.instance_row(instance)])[0])
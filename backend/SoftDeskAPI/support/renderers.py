@@ -0,0 +1,93 @@
+from rest_framework import renderers, parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    """
+    Converts the values the encoders do not handle natively (lazy strings, decimals, datetimes, querysets...)
+    as DRF's JSON encoder does, so that every renderer outputs the same values.
+    """
+    return encoder.default(obj)
+
+
+if orjson is not None:
+    # datetimes go through encode_default, which shortens the microseconds to milliseconds like DRF
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class OrjsonRenderer(renderers.JSONRenderer):
+    """
+    JSON renderer encoding with orjson. The output matches DRF's compact and unicode output except for floats:
+    orjson writes exponents without a sign (1e20 rather than 1e+20) and NaN or infinities as null, where DRF
+    raises. Indented or ASCII responses, the values orjson cannot encode such as integers over 64 bits,
+    and every response when orjson is not installed, are rendered by DRF's renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not (api_settings.COMPACT_JSON and api_settings.UNICODE_JSON) \
+                or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # the line and paragraph separators are valid JSON but not valid JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class OrjsonParser(parsers.JSONParser):
+    """
+    JSON parser decoding with orjson, or with DRF's parser when orjson is not installed.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % exc)
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    Renders the responses as MessagePack, with the same values as the JSON responses.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+
+class MessagePackParser(parsers.BaseParser):
+    """
+    Parses MessagePack request bodies.
+    """
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError('MessagePack parse error - %s' % exc)
@@ -0,0 +1,123 @@
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from .membership import get_member_project_ids
+
+RESPONSE_KEY = 'support:response:%s:%s:%s:%s'
+PROJECT_VERSION_KEY = 'support:response:project:%s'
+USER_VERSION_KEY = 'support:response:user:%s'
+
+
+def get_response_cache():
+    """
+    Returns the cache of SUPPORT_RESPONSE_CACHE, or None when the response cache is disabled.
+    """
+    alias = getattr(settings, 'SUPPORT_RESPONSE_CACHE', None)
+    return caches[alias] if alias else None
+
+
+class ResponseCacheCounters:
+    """
+    Counts the hits and misses of the response cache in this process.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def record(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def summary(self):
+        with self.lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {'enabled': get_response_cache() is not None, 'hits': hits, 'misses': misses,
+                'hit_ratio': round(hits / total, 4) if total else None}
+
+
+counters = ResponseCacheCounters()
+
+
+def get_versions(response_cache, keys):
+    """
+    Returns the current version token of every key, creating the missing ones.
+    Tokens are random rather than counters, so an evicted version never comes back to an old value.
+    """
+    versions = response_cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        response_cache.set_many(missing, None)
+        versions.update(missing)
+    return versions
+
+
+def response_key(request, view, response_cache):
+    """
+    Returns the key of a list or detail response for the request user. It embeds the versions of the projects
+    the user contributes to and of the user, so a write in a project only changes the keys of its contributors.
+    """
+    user_id = request.user.pk
+    keys = [USER_VERSION_KEY % user_id] + [PROJECT_VERSION_KEY % project_id
+                                           for project_id in sorted(get_member_project_ids(request))]
+    versions = get_versions(response_cache, keys)
+    digest = hashlib.sha256()
+    for key in keys:
+        digest.update(('%s=%s;' % (key, versions[key])).encode())
+    digest.update(request.get_host().encode())
+    digest.update(request.get_full_path().encode())
+    return RESPONSE_KEY % (view.basename, view.action, user_id, digest.hexdigest())
+
+
+def invalidate_responses(project_ids=(), user_ids=()):
+    """
+    Changes the versions of the projects and users whose cached responses are outdated,
+    once the current transaction commits so a concurrent read cannot cache the previous rows again.
+    """
+    response_cache = get_response_cache()
+    if response_cache is None:
+        return
+    keys = [PROJECT_VERSION_KEY % project_id for project_id in set(project_ids)]
+    keys += [USER_VERSION_KEY % user_id for user_id in set(user_ids)]
+    transaction.on_commit(lambda: response_cache.set_many({key: uuid.uuid4().hex for key in keys}, None))
+
+
+class CachedResponseMixin:
+    """
+    Serves the list and retrieve responses of a viewset from SUPPORT_RESPONSE_CACHE, per user,
+    route and query parameters. The serialized data is cached, the rendering still runs per request.
+    """
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        response_cache = get_response_cache()
+        if response_cache is None or not request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        key = response_key(request, self, response_cache)
+        data = response_cache.get(key)
+        counters.record(data is not None)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.set(key, response.data, getattr(settings, 'SUPPORT_RESPONSE_CACHE_TTL', 60))
+            response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
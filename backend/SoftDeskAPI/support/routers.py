@@ -0,0 +1,101 @@
+import asyncio
+import hashlib
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.permissions import SAFE_METHODS
+
+PIN_KEY = 'support:replicas:pin:%s'
+
+# set for the safe requests of clients not pinned to the primary, whose reads may go to a replica
+use_replicas = ContextVar('support_use_replicas', default=False)
+
+
+def get_replicas():
+    return getattr(settings, 'SUPPORT_DATABASE_REPLICAS', [])
+
+
+class ReplicaRouter:
+    """
+    Sends the reads of the requests marked by ReplicaRoutingMiddleware to one of the SUPPORT_DATABASE_REPLICAS,
+    picked at random, and every other query to the primary. Writes, unsafe requests, management commands
+    and background threads always use the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if replicas and use_replicas.get():
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replicas hold the same rows as the primary
+        aliases = [DEFAULT_DB_ALIAS, *get_replicas()]
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+def client_key(request):
+    """
+    Identifies the client of a request by its credentials, its session or its address.
+    """
+    credentials = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if credentials:
+        return hashlib.sha256(credentials.encode()).hexdigest()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def is_pinned(request):
+    return cache.get(PIN_KEY % client_key(request)) is not None
+
+
+def pin_to_primary(request, response):
+    """
+    Keeps the reads of a client on the primary for SUPPORT_REPLICA_PIN_SECONDS after one of its writes succeeded,
+    so that it reads its own writes while the replicas catch up.
+    """
+    if response.status_code < 400:
+        cache.set(PIN_KEY % client_key(request), True, getattr(settings, 'SUPPORT_REPLICA_PIN_SECONDS', 5))
+
+
+@sync_and_async_middleware
+def ReplicaRoutingMiddleware(get_response):
+    """
+    Lets the reads of the safe requests go to the replicas, unless their client wrote recently, and pins
+    the clients of the unsafe requests to the primary. Removes itself from the middleware chain
+    when SUPPORT_DATABASE_REPLICAS is empty.
+    """
+    if not get_replicas():
+        raise MiddlewareNotUsed
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            if request.method not in SAFE_METHODS:
+                response = await get_response(request)
+                pin_to_primary(request, response)
+                return response
+            token = use_replicas.set(not is_pinned(request))
+            try:
+                return await get_response(request)
+            finally:
+                use_replicas.reset(token)
+    else:
+        def middleware(request):
+            if request.method not in SAFE_METHODS:
+                response = get_response(request)
+                pin_to_primary(request, response)
+                return response
+            token = use_replicas.set(not is_pinned(request))
+            try:
+                return get_response(request)
+            finally:
+                use_replicas.reset(token)
+    return middleware
@@ -0,0 +1,115 @@
+from django.db import connection, transaction
+
+from .models import Issue, Comment, SearchEntry
+
+SQLITE_SEARCH = """
+    SELECT e.issue_id, e.comment_id, e.project_id, e.body, bm25(support_searchentry_fts) AS rank
+    FROM support_searchentry_fts
+    JOIN support_searchentry e ON e.id = support_searchentry_fts.rowid
+    WHERE support_searchentry_fts MATCH %s
+    AND (e.author_id = %s AND e.project_id NOT IN (SELECT id FROM support_project WHERE deleted_at IS NOT NULL)
+         OR e.project_id IN (SELECT project_id FROM support_contributor WHERE user_id = %s))
+    ORDER BY rank
+    LIMIT %s OFFSET %s
+"""
+POSTGRESQL_SEARCH = """
+    SELECT e.issue_id, e.comment_id, e.project_id, e.body,
+    -ts_rank(to_tsvector('english', e.body), plainto_tsquery('english', %s)) AS rank
+    FROM support_searchentry e
+    WHERE to_tsvector('english', e.body) @@ plainto_tsquery('english', %s)
+    AND (e.author_id = %s AND e.project_id NOT IN (SELECT id FROM support_project WHERE deleted_at IS NOT NULL)
+         OR e.project_id IN (SELECT project_id FROM support_contributor WHERE user_id = %s))
+    ORDER BY rank
+    LIMIT %s OFFSET %s
+"""
+
+
+def issue_entry(issue):
+    return SearchEntry(issue_id=issue.pk, project_id=issue.project_id, author_id=issue.author_id,
+                       body=issue.description)
+
+
+def comment_entry(comment):
+    return SearchEntry(issue_id=comment.issue_id, comment_id=comment.pk, project_id=comment.issue.project_id,
+                       author_id=comment.author_id, body=comment.description)
+
+
+def index_issues(issues):
+    """
+    Replaces the search entries of the issues, and moves the entries of their comments to the issue project.
+    """
+    issues = list(issues)
+    with transaction.atomic():
+        SearchEntry.objects.filter(issue__in=issues, comment__isnull=True).delete()
+        SearchEntry.objects.bulk_create([issue_entry(issue) for issue in issues])
+        projects = {}
+        for issue in issues:
+            projects.setdefault(issue.project_id, []).append(issue.pk)
+        for project_id, issue_ids in projects.items():
+            SearchEntry.objects.filter(issue_id__in=issue_ids).exclude(project_id=project_id) \
+                .update(project_id=project_id)
+
+
+def index_comments(comments):
+    """
+    Replaces the search entries of the comments, whose issue must be loaded.
+    """
+    comments = list(comments)
+    with transaction.atomic():
+        SearchEntry.objects.filter(comment__in=comments).delete()
+        SearchEntry.objects.bulk_create([comment_entry(comment) for comment in comments])
+
+
+def rebuild_search_index(chunk_size=500):
+    """
+    Recreates every search entry from the issue and comment tables, returns the number of entries.
+    """
+    with transaction.atomic():
+        SearchEntry.objects.all().delete()
+        entries = 0
+        for entry_factory, queryset in [(issue_entry, Issue.objects.all()),
+                                        (comment_entry, Comment.objects.select_related('issue'))]:
+            batch = []
+            for instance in queryset.iterator(chunk_size=chunk_size):
+                batch.append(entry_factory(instance))
+                if len(batch) == chunk_size:
+                    entries += len(SearchEntry.objects.bulk_create(batch))
+                    batch = []
+            entries += len(SearchEntry.objects.bulk_create(batch))
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("INSERT INTO support_searchentry_fts(support_searchentry_fts) VALUES ('rebuild')")
+    return entries
+
+
+def match_expression(query):
+    """
+    Quotes every term of the query so FTS5 treats the input as plain words, all of them required.
+    """
+    return ' '.join('"%s"' % term.replace('"', '""') for term in query.split())
+
+
+def search(user, query, limit, offset=0):
+    """
+    Returns the issues and comments matching the query that the user authored or can see as a contributor,
+    best match first.
+    """
+    if not query.split():
+        return []
+    if connection.vendor == 'sqlite':
+        sql, params = SQLITE_SEARCH, [match_expression(query), user.pk, user.pk, limit, offset]
+    elif connection.vendor == 'postgresql':
+        sql, params = POSTGRESQL_SEARCH, [query, query, user.pk, user.pk, limit, offset]
+    else:
+        raise NotImplementedError('Full-text search is not supported on %s.' % connection.vendor)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    to_comment_pk = Comment._meta.pk.to_python
+    return [{'type': 'comment' if comment_id else 'issue',
+             'id': to_comment_pk(comment_id) if comment_id else issue_id,
+             'issue': issue_id,
+             'project': project_id,
+             'description': body,
+             'rank': -rank}
+            for issue_id, comment_id, project_id, body, rank in rows]
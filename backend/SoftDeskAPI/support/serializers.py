@@ -1,35 +1,101 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .models import User, Project, Contributor, Issue, Comment
+from .models import User, Project, Contributor, Issue, Comment, ProjectDeletion
+from .instrumentation import InstrumentedSerializerMixin
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    A primary key related field resolved from objects loaded beforehand, used by the bulk routes.
+    """
+
+    def __init__(self, objects, **kwargs):
+        self.objects = objects
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in self.objects:
+            self.fail('does_not_exist', pk_value=data)
+        return self.objects[pk]
+
+
+class InstrumentedListSerializer(InstrumentedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Keeps only the given fields, and replaces the given related fields by the nested serializers
+    of Meta.expandable_fields.
+    """
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        for field_name in expand:
+            self.fields[field_name] = self.Meta.expandable_fields[field_name](read_only=True)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
 
 url = serializers.HyperlinkedIdentityField(view_name="campaigns:promotion-detail", read_only=True)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
+        list_serializer_class = InstrumentedListSerializer
         fields = ['id', 'username', 'password', 'email', 'age', 'can_be_shared', 'can_be_contacted', 'url']
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class UserSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'url']
+
+
+class ProjectSerializer(SparseFieldsetSerializerMixin, InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Project
-        fields = ['id', 'author', 'time_created', 'title', 'description', 'type', 'url']
+        list_serializer_class = InstrumentedListSerializer
+        fields = ['id', 'author', 'time_created', 'updated_at', 'title', 'description', 'type', 'url']
+        expandable_fields = {'author': UserSummarySerializer}
 
 
-class ContributorSerializer(serializers.ModelSerializer):
+class ContributorSerializer(SparseFieldsetSerializerMixin, InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Contributor
-        fields = ['id', 'user', 'project', 'url']
+        list_serializer_class = InstrumentedListSerializer
+        fields = ['id', 'user', 'project', 'updated_at', 'url']
+        expandable_fields = {'user': UserSummarySerializer, 'project': ProjectSerializer}
+        # duplicates are rejected by the unique_contributor constraint when inserting, not by a prior query
+        validators = []
 
 
-class IssueSerializer(serializers.ModelSerializer):
+class IssueSerializer(SparseFieldsetSerializerMixin, InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Issue
-        fields = ['id', 'project', 'author', 'description', 'time_created',
+        list_serializer_class = InstrumentedListSerializer
+        fields = ['id', 'project', 'author', 'description', 'time_created', 'updated_at',
                   'affected_to', 'status', 'priority', 'tag', 'url']
+        expandable_fields = {'project': ProjectSerializer, 'author': UserSummarySerializer,
+                             'affected_to': UserSummarySerializer}
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetSerializerMixin, InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Comment
-        fields = ['id', 'issue', 'author', 'description', 'time_created', 'url']
+        list_serializer_class = InstrumentedListSerializer
+        fields = ['id', 'issue', 'author', 'description', 'time_created', 'updated_at', 'url']
+        expandable_fields = {'issue': IssueSerializer, 'author': UserSummarySerializer}
+
+
+class ProjectDeletionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProjectDeletion
+        fields = ['id', 'project_id', 'requested_at', 'finished_at', 'total_issues', 'deleted_issues',
+                  'total_comments', 'deleted_comments']
@@ -0,0 +1,53 @@
+import threading
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.db import connections, transaction
+
+# reentrant, for the write transactions nested in another one
+writer_lock = threading.RLock()
+
+# SUPPORT_SQLITE_PRAGMAS when the setting is absent
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+}
+
+
+def is_enabled(connection):
+    return connection.vendor == 'sqlite' and getattr(settings, 'SUPPORT_SQLITE_HIGH_CONCURRENCY', False)
+
+
+def configure_connection(sender, connection, **kwargs):
+    """
+    connection_created receiver applying SUPPORT_SQLITE_PRAGMAS to every new SQLite connection when
+    SUPPORT_SQLITE_HIGH_CONCURRENCY is set, journal_mode=wal letting the readers go on while a transaction writes.
+    """
+    if not is_enabled(connection):
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SUPPORT_SQLITE_PRAGMAS', DEFAULT_PRAGMAS).items():
+            cursor.execute('PRAGMA %s = %s' % (name, value))
+
+
+def serialized_writes(using='default'):
+    """
+    Returns a context holding the writer lock of the process when SUPPORT_SQLITE_HIGH_CONCURRENCY is set
+    and the database is SQLite. Writers queue on the lock instead of failing with "database is locked"
+    when a deferred transaction cannot upgrade to a write lock.
+    """
+    if is_enabled(connections[using]):
+        return writer_lock
+    return nullcontext()
+
+
+@contextmanager
+def write_transaction(using='default'):
+    """
+    Runs a write transaction holding the writer lock, which is taken only once the request is authenticated,
+    validated and its passwords hashed, and released before the response is rendered.
+    """
+    with serialized_writes(using), transaction.atomic(using=using):
+        yield
@@ -0,0 +1,73 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Issue, ProjectIssueCount
+
+DIMENSIONS = [ProjectIssueCount.STATUS, ProjectIssueCount.PRIORITY, ProjectIssueCount.TAG]
+
+
+def issue_counter_keys(issue):
+    """
+    Returns the (project id, dimension, value) counters an issue contributes to.
+    """
+    return [(issue.project_id, dimension, getattr(issue, dimension)) for dimension in DIMENSIONS]
+
+
+def count_issues(issues, delta=1):
+    counts = Counter()
+    for issue in issues:
+        for key in issue_counter_keys(issue):
+            counts[key] += delta
+    return counts
+
+
+def apply_issue_counts(counts):
+    """
+    Adds the deltas of a {(project id, dimension, value): delta} mapping to the counter table.
+    """
+    for (project_id, dimension, value), delta in counts.items():
+        if not delta:
+            continue
+        counters = ProjectIssueCount.objects.filter(project_id=project_id, dimension=dimension, value=value)
+        if counters.update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                ProjectIssueCount.objects.create(project_id=project_id, dimension=dimension, value=value, count=delta)
+        except IntegrityError:
+            counters.update(count=F('count') + delta)
+
+
+def rebuild_issue_counts(project_ids=None):
+    """
+    Recomputes the counters of the given projects, or of every project, from the issue table.
+    """
+    counters, issues = ProjectIssueCount.objects.all(), Issue.objects.all()
+    if project_ids is not None:
+        counters, issues = counters.filter(project_id__in=project_ids), issues.filter(project_id__in=project_ids)
+    rows = []
+    for dimension in DIMENSIONS:
+        for row in issues.order_by().values('project_id', dimension).annotate(count=Count('pk')):
+            rows.append(ProjectIssueCount(project_id=row['project_id'], dimension=dimension,
+                                          value=row[dimension], count=row['count']))
+    with transaction.atomic():
+        counters.delete()
+        ProjectIssueCount.objects.bulk_create(rows)
+    return len(rows)
+
+
+def get_project_issue_counts(project):
+    """
+    Returns the issue counts of a project by dimension, with every choice listed.
+    """
+    counts = {(dimension, value): count for dimension, value, count
+              in ProjectIssueCount.objects.filter(project=project).values_list('dimension', 'value', 'count')}
+    data = {'issues': sum(count for (dimension, value), count in counts.items()
+                          if dimension == ProjectIssueCount.STATUS)}
+    for dimension in DIMENSIONS:
+        choices = Issue._meta.get_field(dimension).choices
+        data[dimension] = [{'value': value, 'label': label, 'count': counts.get((dimension, value), 0)}
+                           for value, label in choices]
+    return data
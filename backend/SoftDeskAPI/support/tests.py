@@ -0,0 +1,463 @@
+import asyncio
+import base64
+from importlib import import_module
+from io import StringIO
+from time import perf_counter
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from rest_framework.test import APIClient
+
+from .async_views import ASGI_URLCONF
+from .models import User, Project, Contributor, Issue, Comment, ProjectDeletion
+
+# Milliseconds allowed for a request on the test dataset, generous enough for a slow machine
+READ_LATENCY = 250
+WRITE_LATENCY = 500
+BATCH_LATENCY = 1000
+
+
+def seed_test_dataset():
+    """
+    Seeds a small dataset, with a superuser created first so that it is the SUPPORT_PROJECT_ADMIN_ID user.
+    """
+    superuser = User.objects.create_superuser('admin', 'admin@example.com', 'admin-password', age=30)
+    call_command('seed_dataset', users=10, projects=12, contributors=4, issues=150, comments=400, seed=0,
+                 stdout=StringIO())
+    return superuser
+
+
+@override_settings(SUPPORT_DELETION_WORKER=False, SUPPORT_RESPONSE_CACHE=None,
+                   PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class QueryBudgetTests(TestCase):
+    """
+    Checks the queries and the latency of every action of the viewsets. The query budgets are counted from what
+    each action has to do, the transaction savepoints aside; the membership cache starts empty in every test.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = seed_test_dataset()
+        cls.user = User.objects.get(username='seed0')
+        cls.project = Project.objects.filter(author=cls.user).earliest('pk')
+        cls.issue = Issue.objects.filter(project=cls.project, author=cls.user).earliest('pk')
+        cls.comment = Comment.objects.filter(issue__project=cls.project, author=cls.user).earliest('time_created')
+        cls.deletion = ProjectDeletion.objects.create(project_id=0, author=cls.user)
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client = self.client_for(self.user)
+
+    @staticmethod
+    def client_for(user):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+    def assertWithinBudget(self, max_queries, max_ms, method, url, data=None, client=None, status=200):
+        client = client or self.client
+        start = perf_counter()
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(client, method)(url, data, format='json')
+            if hasattr(response, 'streaming_content'):
+                b''.join(response.streaming_content)
+        elapsed = (perf_counter() - start) * 1000
+        queries = [query['sql'] for query in context.captured_queries if 'SAVEPOINT' not in query['sql']]
+        self.assertEqual(response.status_code, status, '%s %s' % (method.upper(), url))
+        self.assertLessEqual(len(queries), max_queries, '%s %s\n%s' % (method.upper(), url, '\n'.join(queries)))
+        self.assertLessEqual(elapsed, max_ms, '%s %s took %.0f ms' % (method.upper(), url, elapsed))
+        return response
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(context.captured_queries)
+
+    def test_reads(self):
+        # the page of rows, the cursor paginated lists and the detail routes filter on the membership in SQL
+        for basename in ['project', 'issue', 'comment']:
+            self.assertWithinBudget(1, READ_LATENCY, 'get', reverse('%s-list' % basename))
+        # the count of the page number pagination and the page
+        self.assertWithinBudget(2, READ_LATENCY, 'get', reverse('user-list'))
+        self.assertWithinBudget(2, READ_LATENCY, 'get', reverse('contributor-list'))
+        self.assertWithinBudget(2, READ_LATENCY, 'get', reverse('deletion-list'))
+        contributor = Contributor.objects.filter(user=self.user).earliest('pk')
+        for basename, pk in [('user', self.user.pk), ('project', self.project.pk), ('contributor', contributor.pk),
+                             ('issue', self.issue.pk), ('comment', self.comment.pk), ('deletion', self.deletion.pk)]:
+            self.assertWithinBudget(1, READ_LATENCY, 'get', reverse('%s-detail' % basename, args=[pk]))
+        # the project and its counters
+        self.assertWithinBudget(2, READ_LATENCY, 'get', reverse('project-stats', args=[self.project.pk]))
+        # the project, then one query per chunk of comments and of issues
+        self.assertWithinBudget(3, BATCH_LATENCY, 'get', reverse('project-export', args=[self.project.pk]))
+        # one query per source of the feed: projects, contributors, issues, comments and tombstones
+        self.assertWithinBudget(5, BATCH_LATENCY, 'get', reverse('change-list'))
+        self.assertWithinBudget(1, READ_LATENCY, 'get', reverse('search-list') + '?q=seeded')
+        self.assertWithinBudget(0, READ_LATENCY, 'get', reverse('metrics-list'), client=self.client_for(self.superuser))
+
+    def test_list_queries_do_not_grow_with_the_page_size(self):
+        for basename in ['user', 'project', 'contributor', 'issue', 'comment', 'deletion']:
+            url = reverse('%s-list' % basename)
+            self.assertEqual(self.count_queries(url + '?page_size=2'), self.count_queries(url + '?page_size=100'),
+                             basename)
+
+    def test_user_writes(self):
+        new_user = {'username': 'budget-user', 'password': 'budget-password', 'email': 'budget@example.com',
+                    'age': 30, 'can_be_shared': False, 'can_be_contacted': False}
+        # the unique username validator, the username or email lookup and the insert
+        self.assertWithinBudget(3, WRITE_LATENCY, 'post', reverse('user-list'), new_user, client=self.client_for(None),
+                                status=201)
+        budget_user = User.objects.get(username='budget-user')
+        client = self.client_for(budget_user)
+        url = reverse('user-detail', args=[budget_user.pk])
+        # the user, the unique username validator and the update
+        self.assertWithinBudget(3, WRITE_LATENCY, 'put', url, dict(new_user, password='budget-password-2'),
+                                client=client, status=202)
+        # the user and the update
+        self.assertWithinBudget(2, WRITE_LATENCY, 'patch', url, {'age': 31}, client=client, status=202)
+        # the user, the projects, memberships, issues and comments cascaded with it for the tombstones,
+        # then the deletion collector: the user, 4 cascaded selects and 8 deletes
+        self.assertWithinBudget(18, WRITE_LATENCY, 'delete', url, client=client)
+
+    def test_project_writes(self):
+        new_project = {'author': self.user.pk, 'title': 'Budget project', 'description': 'Budget', 'type': 0}
+        # the author field, whether the admin user exists, the project and its contributors
+        self.assertWithinBudget(4, WRITE_LATENCY, 'post', reverse('project-list'), new_project, status=201)
+        project = Project.objects.filter(author=self.user).latest('pk')
+        url = reverse('project-detail', args=[project.pk])
+        # the project, its author, the author field and the update
+        self.assertWithinBudget(4, WRITE_LATENCY, 'put', url, dict(new_project, title='Budget project 2'), status=202)
+        # the project, its author and the update
+        self.assertWithinBudget(3, WRITE_LATENCY, 'patch', url, {'title': 'Budget project 3'}, status=202)
+        # the project, its author and contributors, the deletion mark, the contributors, the counts of the
+        # deletion, its insert and the tombstones
+        self.assertWithinBudget(9, WRITE_LATENCY, 'delete', url)
+
+    def test_contributor_writes(self):
+        users = list(User.objects.exclude(contributor__project=self.project).exclude(is_superuser=True)[:2])
+        # the user and project fields, the author of the project and the insert
+        self.assertWithinBudget(4, WRITE_LATENCY, 'post', reverse('contributor-list'),
+                                {'user': users[0].pk, 'project': self.project.pk}, status=201)
+        contributor = Contributor.objects.get(user=users[0], project=self.project)
+        url = reverse('contributor-detail', args=[contributor.pk])
+        # the contributor, the user and project fields, the authors of both projects, the update and the tombstone
+        self.assertWithinBudget(8, WRITE_LATENCY, 'put', url, {'user': users[1].pk, 'project': self.project.pk},
+                                status=202)
+        # the contributor, the user field, the project and its author, the update and the tombstone
+        self.assertWithinBudget(6, WRITE_LATENCY, 'patch', url, {'user': users[0].pk}, status=202)
+        # the contributor, the project and its author, the deletion collector and the tombstone
+        self.assertWithinBudget(6, WRITE_LATENCY, 'delete', url)
+
+    def test_issue_writes(self):
+        new_issue = {'project': self.project.pk, 'author': self.user.pk, 'description': 'Budget issue',
+                     'affected_to': self.user.pk, 'status': 0, 'priority': 0, 'tag': 0}
+        # the project, author and assignee fields and the membership, the insert, an update of the status,
+        # priority and tag counters plus an insert when the counter does not exist yet, and the search entry
+        self.assertWithinBudget(14, WRITE_LATENCY, 'post', reverse('issue-list'), new_issue, status=201)
+        issue = Issue.objects.filter(author=self.user).latest('pk')
+        url = reverse('issue-detail', args=[issue.pk])
+        # the issue, the project, author and assignee fields and the author of the project, the update,
+        # the previous status counter and the new one with its possible insert, and the search entry
+        self.assertWithinBudget(12, WRITE_LATENCY, 'put', url, dict(new_issue, status=1), status=202)
+        # the issue, its author, the update, the previous and new priority counters with the possible insert,
+        # and the search entry
+        self.assertWithinBudget(9, WRITE_LATENCY, 'patch', url, {'priority': 1}, status=202)
+        # the issue, its author, the comment ids of the tombstones, the deletion collector with the search
+        # entries, the 3 counters and the tombstones
+        self.assertWithinBudget(13, WRITE_LATENCY, 'delete', url)
+
+    def test_comment_writes(self):
+        new_comment = {'issue': self.issue.pk, 'author': self.user.pk, 'description': 'Budget comment'}
+        # the issue and author fields, the project and the membership, the insert and the search entry
+        self.assertWithinBudget(7, WRITE_LATENCY, 'post', reverse('comment-list'), new_comment, status=201)
+        comment = Comment.objects.filter(author=self.user).latest('time_created')
+        url = reverse('comment-detail', args=[comment.pk])
+        # the comment, the issue and author fields, the author of the project, the update and the search entry
+        self.assertWithinBudget(7, WRITE_LATENCY, 'put', url, dict(new_comment, description='Budget 2'), status=202)
+        # the comment with its issue, its author, the update and the search entry
+        self.assertWithinBudget(5, WRITE_LATENCY, 'patch', url, {'description': 'Budget 3'}, status=202)
+        # the comment, its author, the deletion collector with the search entry and the tombstone
+        self.assertWithinBudget(6, WRITE_LATENCY, 'delete', url)
+
+    def test_bulk_writes_do_not_grow_with_the_batch_size(self):
+        new_issue = {'project': self.project.pk, 'author': self.user.pk, 'description': 'Bulk issue',
+                     'affected_to': self.user.pk, 'status': 2, 'priority': 2, 'tag': 2}
+        new_comment = {'issue': self.issue.pk, 'author': self.user.pk, 'description': 'Bulk comment'}
+        # creates the counters of the batches first, so that every batch only updates them
+        self.client.post(reverse('issue-bulk'), [new_issue], format='json')
+        for size in [2, 100]:
+            # the projects, the authors and assignees, the memberships, the insert, the 3 counters
+            # and the search entries
+            response = self.assertWithinBudget(11, BATCH_LATENCY, 'post', reverse('issue-bulk'), [new_issue] * size,
+                                               status=201)
+            # the issues, the update, the previous and new status counters, and the search entries
+            self.assertWithinBudget(7, BATCH_LATENCY, 'patch', reverse('issue-bulk'),
+                                    [{'id': result['id'], 'status': 1} for result in response.data], status=202)
+            self.client.patch(reverse('issue-bulk'), [{'id': result['id'], 'status': 2} for result in response.data],
+                              format='json')
+            # the issues, the authors, the memberships, the insert and the search entries
+            response = self.assertWithinBudget(6, BATCH_LATENCY, 'post', reverse('comment-bulk'),
+                                               [new_comment] * size, status=201)
+            # the comments, the update and the search entries
+            self.assertWithinBudget(4, BATCH_LATENCY, 'patch', reverse('comment-bulk'),
+                                    [{'id': str(result['id']), 'description': 'Bulk'} for result in response.data],
+                                    status=202)
+
+
+@override_settings(SUPPORT_RESPONSE_CACHE=None)
+class RowReadTests(TestCase):
+    """
+    Checks that the list and detail routes served from .values() rows (SUPPORT_ROW_READS) return the same bodies
+    as the serializers, for the full representations and for subsets of their fields.
+    """
+    # list and detail routes served from rows, with the field subsets requested besides the full representation
+    ROUTES = [
+        ('project', Project, ['id,title', 'type,author,updated_at', 'url']),
+        ('contributor', Contributor, ['user,project', 'url,updated_at']),
+        ('issue', Issue, ['id,status,priority,tag', 'description,affected_to', 'project,time_created,url']),
+        ('comment', Comment, ['id,description', 'issue,author,url']),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_test_dataset()
+        cls.users = list(User.objects.filter(username__in=['seed0', 'seed5']))
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def assertSameResponses(self, client, url, query=None):
+        responses = []
+        for row_reads in [False, True]:
+            with self.settings(SUPPORT_ROW_READS=row_reads):
+                responses.append(client.get(url, query, HTTP_ACCEPT='application/json'))
+        serialized, rows = responses
+        self.assertEqual(serialized.status_code, 200, url)
+        self.assertEqual(rows.status_code, 200, url)
+        self.assertEqual(serialized.content, rows.content, '%s %s' % (url, query or ''))
+        return serialized.json()
+
+    def test_lists(self):
+        for user in self.users:
+            client = APIClient()
+            client.force_authenticate(user)
+            for basename, model, fieldsets in self.ROUTES:
+                for fields in [None] + fieldsets:
+                    with self.subTest(user=user.username, route=basename, fields=fields):
+                        query = {'page_size': 2, **({'fields': fields} if fields else {})}
+                        url, pages = reverse('%s-list' % basename), 0
+                        # follows the next links, to compare the pages positioned by a cursor
+                        while url and pages < 3:
+                            data = self.assertSameResponses(client, url, query)
+                            url, query, pages = data.get('next'), None, pages + 1
+                        self.assertGreater(pages, 1)
+
+    def test_details(self):
+        for user in self.users:
+            client = APIClient()
+            client.force_authenticate(user)
+            for basename, model, fieldsets in self.ROUTES:
+                lookup = {'user': user} if model is Contributor else {'author': user}
+                instances = model.objects.filter(**lookup).order_by('pk')[:3]
+                self.assertTrue(instances)
+                for instance in instances:
+                    for fields in [None] + fieldsets:
+                        with self.subTest(user=user.username, route=basename, pk=instance.pk, fields=fields):
+                            self.assertSameResponses(client, reverse('%s-detail' % basename, args=[instance.pk]),
+                                                     {'fields': fields} if fields else None)
+
+
+@override_settings(SUPPORT_ASYNC_READS=True, SUPPORT_RESPONSE_CACHE=None,
+                   PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AsyncReadTests(TransactionTestCase):
+    """
+    Serves requests through the ASGI handler, the reads by async views running in worker threads, hence
+    a transaction test case: the rows must be committed for the connections of the worker threads to see them.
+    """
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        seed_test_dataset()
+        self.user = User.objects.get(username='seed0')
+        self.issue = Issue.objects.filter(project__contributor__user=self.user).earliest('pk')
+        # the extra arguments of the async client are sent as headers
+        self.headers = {'authorization': 'Basic %s' % base64.b64encode(b'seed0:seed-password').decode()}
+        self.client = AsyncClient()
+
+    def test_urlconf(self):
+        urlconf = import_module(ASGI_URLCONF)
+        for url in [reverse('project-list'), reverse('issue-detail', args=[self.issue.pk])]:
+            self.assertTrue(asyncio.iscoroutinefunction(resolve(url, urlconf).func), url)
+        self.assertFalse(asyncio.iscoroutinefunction(resolve(reverse('user-list'), urlconf).func))
+        self.assertFalse(asyncio.iscoroutinefunction(resolve(reverse('api-root'), urlconf).func))
+
+    async def test_reads(self):
+        # the queries run on the connections of the worker threads, only the latency is budgeted here
+        start = perf_counter()
+        response = await self.client.get(reverse('issue-list'), {'page_size': 5}, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 5)
+        response = await self.client.get(reverse('issue-detail', args=[self.issue.pk]), **self.headers)
+        self.assertLessEqual((perf_counter() - start) * 1000, 2 * READ_LATENCY)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], self.issue.pk)
+        issue = await sync_to_async(Issue.objects.get)(pk=self.issue.pk)
+        self.assertEqual(response.json()['description'], issue.description)
+
+    async def test_export_is_wsgi_only(self):
+        response = await self.client.get(reverse('project-export', args=[self.issue.project_id]), **self.headers)
+        self.assertEqual(response.status_code, 501)
+
+
+@override_settings(SUPPORT_RESPONSE_CACHE=None)
+class MoveTombstoneTests(TestCase):
+    """
+    Checks that the contributors losing sight of an issue or comment moved to another project get its deletion
+    from the change feed, and that the contributors of both projects do not.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, cls.shared, cls.former = [
+            User.objects.create_user(username, '%s@example.com' % username, 'password', age=30)
+            for username in ['author', 'shared', 'former']]
+        cls.source, cls.target = [Project.objects.create(author=cls.author, title=title, description=title, type=0)
+                                  for title in ['Source', 'Target']]
+        Contributor.objects.bulk_create([Contributor(user=cls.author, project=cls.source),
+                                         Contributor(user=cls.author, project=cls.target),
+                                         Contributor(user=cls.shared, project=cls.source),
+                                         Contributor(user=cls.shared, project=cls.target),
+                                         Contributor(user=cls.former, project=cls.source)])
+        cls.issues = [Issue.objects.create(project=cls.source, author=cls.author, description='Issue %s' % index,
+                                           affected_to=cls.author, status=0, priority=0, tag=0)
+                      for index in range(2)]
+        cls.target_issue = Issue.objects.create(project=cls.target, author=cls.author, description='Target',
+                                                affected_to=cls.author, status=0, priority=0, tag=0)
+        cls.comments = [Comment.objects.create(issue=issue, author=cls.author, description='Comment')
+                        for issue in cls.issues]
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def deletions(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        results = client.get(reverse('change-list')).json()['results']
+        return {(change['type'], change['id']) for change in results if change['action'] == 'delete'}
+
+    def issue_data(self, issue, **changes):
+        return dict({'project': issue.project_id, 'author': self.author.pk, 'description': issue.description,
+                     'affected_to': self.author.pk, 'status': 0, 'priority': 0, 'tag': 0}, **changes)
+
+    def test_issue_move(self):
+        issue, comment = self.issues[0], self.comments[0]
+        response = self.client.put(reverse('issue-detail', args=[issue.pk]),
+                                   self.issue_data(issue, project=self.target.pk), format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.deletions(self.former), {('issue', str(issue.pk)), ('comment', str(comment.pk))})
+        self.assertEqual(self.deletions(self.shared), set())
+
+    def test_issue_bulk_move(self):
+        issue, comment = self.issues[1], self.comments[1]
+        response = self.client.patch(reverse('issue-bulk'), [{'id': issue.pk, 'project': self.target.pk}],
+                                     format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.deletions(self.former), {('issue', str(issue.pk)), ('comment', str(comment.pk))})
+        self.assertEqual(self.deletions(self.shared), set())
+
+    def test_comment_moves(self):
+        comment = self.comments[0]
+        response = self.client.put(reverse('comment-detail', args=[comment.pk]),
+                                   {'issue': self.target_issue.pk, 'author': self.author.pk, 'description': 'Moved'},
+                                   format='json')
+        self.assertEqual(response.status_code, 202)
+        comment = self.comments[1]
+        response = self.client.patch(reverse('comment-bulk'), [{'id': str(comment.pk), 'issue': self.target_issue.pk}],
+                                     format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.deletions(self.former), {('comment', str(comment.pk)) for comment in self.comments})
+        self.assertEqual(self.deletions(self.shared), set())
+
+    def test_update_within_the_project(self):
+        issue = self.issues[0]
+        response = self.client.put(reverse('issue-detail', args=[issue.pk]), self.issue_data(issue, status=1),
+                                   format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.deletions(self.former), set())
+
+
+@override_settings(SUPPORT_RESPONSE_CACHE=None)
+class ExpandETagTests(TestCase):
+    """
+    Checks that the ETags of the responses embedding related rows change with those rows.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_test_dataset()
+        cls.user = User.objects.get(username='seed0')
+        cls.issue = Issue.objects.filter(project__author=cls.user).earliest('pk')
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_expanded_project(self):
+        project = self.issue.project
+        urls = [reverse('issue-detail', args=[self.issue.pk]) + '?expand=project',
+                reverse('issue-list') + '?expand=project&project=%s' % project.pk]
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        for url, etag in zip(urls, etags):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self.client.put(reverse('project-detail', args=[project.pk]),
+                                   {'author': self.user.pk, 'title': 'Renamed', 'description': project.description,
+                                    'type': project.type}, format='json')
+        self.assertEqual(response.status_code, 202)
+        for url, etag in zip(urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotEqual(response['ETag'], etag)
+
+    def test_expanded_user(self):
+        response = self.client.get(reverse('issue-detail', args=[self.issue.pk]) + '?expand=author')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+        response = self.client.get(reverse('issue-list') + '?expand=author')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_test_dataset()
+        cls.user = User.objects.get(username='seed0')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_search(self):
+        response = self.client.get(reverse('search-list'), {'q': 'seeded'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['results'])
+
+    def test_unsupported_backend(self):
+        with mock.patch.object(connection, 'vendor', 'mysql'):
+            response = self.client.get(reverse('search-list'), {'q': 'seeded'})
+        self.assertEqual(response.status_code, 501)
@@ -1,12 +1,45 @@
+from copy import copy
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from rest_framework.response import Response
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework import viewsets, filters, status
 from django.contrib.auth.hashers import make_password
 from rest_framework.permissions import IsAuthenticated, BasePermission
-
-from .models import User, Project, Contributor, Issue, Comment
-from .serializers import UserSerializer, ProjectSerializer, \
-    ContributorSerializer, IssueSerializer, CommentSerializer
+from rest_framework.relations import PrimaryKeyRelatedField
+
+from .models import User, Project, Contributor, Issue, Comment, Tombstone, ProjectDeletion
+from .authentication import invalidate_user
+from .exports import export_ndjson, export_csv
+from .stats import apply_issue_counts, count_issues, get_project_issue_counts
+from .search import index_issues, index_comments, search
+from .deletion import deleted_project_ids, mark_project_deleted, schedule_purge
+from .changes import decode_cursor, encode_cursor, get_changes, record_comment_moves, record_deletion, \
+    record_issue_moves, record_moves
+from .instrumentation import histograms
+from .pagination import TimeCreatedCursorPagination
+from .membership import get_member_project_ids, get_project_admin_id, get_project_id, invalidate_membership, \
+    invalidate_project_admin
+from .conditional import ConditionalResponseMixin
+from .fieldsets import SparseFieldsetMixin
+from .readers import RowReadMixin
+from .responses import CachedResponseMixin, counters, invalidate_responses
+from .sqlite import write_transaction
+from .serializers import UserSerializer, ProjectSerializer, ContributorSerializer, \
+    IssueSerializer, CommentSerializer, ProjectDeletionSerializer, PrefetchedPrimaryKeyRelatedField
+
+EXPORTERS = {
+    'ndjson': ('application/x-ndjson', export_ndjson),
+    'csv': ('text/csv', export_csv),
+}
 
 
 # Create your views here.
@@ -55,8 +88,40 @@ class UserViewSet(viewsets.ModelViewSet):
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        if instance.author == request.user:
-            instance.__class__.objects.get(pk=instance.pk).delete()
+        if instance == request.user:
+            invalidate_user(instance)
+            invalidate_project_admin(instance.pk)
+            with write_transaction():
+                # the projects of the user are deleted by the cascade, their other members lose access to them
+                project_ids = list(Project.objects.filter(author=instance).values_list('pk', flat=True))
+                members = list(Contributor.objects.filter(project_id__in=project_ids).exclude(user=instance)
+                               .values_list('project_id', 'user_id'))
+                tombstones = []
+                for project_id, user_id in members:
+                    tombstones += record_deletion(Project, [project_id], project_id, [user_id])
+                # in the projects of others, the cascade deletes the membership of the user, the issues they
+                # authored or were assigned with their comments, and the comments they authored
+                for pk, project_id in Contributor.objects.filter(user=instance).exclude(project__author=instance) \
+                        .values_list('pk', 'project_id'):
+                    tombstones += record_deletion(Contributor, [pk], project_id)
+                issues = list(Issue.objects.filter(Q(author=instance) | Q(affected_to=instance))
+                              .exclude(project__author=instance).only('project_id', 'status', 'priority', 'tag'))
+                for issue in issues:
+                    tombstones += record_deletion(Issue, [issue.pk], issue.project_id)
+                comments = Comment.objects.filter(Q(author=instance) | Q(issue__author=instance) |
+                                                  Q(issue__affected_to=instance)) \
+                    .exclude(issue__project__author=instance).values_list('pk', 'issue__project_id')
+                for pk, project_id in comments:
+                    tombstones += record_deletion(Comment, [pk], project_id)
+                # the counters of the projects of the user are deleted with them
+                counts = count_issues(issues, -1)
+                instance.__class__.objects.get(pk=instance.pk).delete()
+                apply_issue_counts(counts)
+                Tombstone.objects.bulk_create(tombstones)
+                member_ids = {user_id for project_id, user_id in members}
+                invalidate_responses({tombstone.project_id for tombstone in tombstones} | set(project_ids),
+                                     member_ids | {instance.pk})
+            invalidate_membership(*member_ids)
             return Response(status=status.HTTP_200_OK)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
@@ -66,10 +131,14 @@ class UserViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        if instance.username == request.user:
-            password = serializer.validated_data['password']
-            serializer.validated_data['password'] = make_password(password)
-            self.perform_update(serializer)
+        if instance == request.user:
+            if 'password' in serializer.validated_data:
+                serializer.validated_data['password'] = make_password(serializer.validated_data['password'])
+            previous = copy(instance)
+            with write_transaction():
+                self.perform_update(serializer)
+                # after the save, so a request authenticated meanwhile cannot cache the old credentials again
+                transaction.on_commit(lambda: (invalidate_user(previous), invalidate_user(instance)))
             return Response(status=status.HTTP_202_ACCEPTED)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
@@ -82,8 +151,10 @@ class UserViewSet(viewsets.ModelViewSet):
             new_user['username'], new_user['password'], new_user['email'], \
             new_user['age'], new_user['can_be_shared'], new_user['can_be_contacted']
         if not User.objects.filter(Q(username=username) | Q(email=email)):
-            User.objects.create(username=username, password=make_password(password), email=email, age=age,
-                                can_be_shared=can_be_shared, can_be_contacted=can_be_contacted)
+            password = make_password(password)
+            with write_transaction():
+                User.objects.create(username=username, password=password, email=email, age=age,
+                                    can_be_shared=can_be_shared, can_be_contacted=can_be_contacted)
             return Response(status=status.HTTP_201_CREATED)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
@@ -91,23 +162,53 @@ class UserViewSet(viewsets.ModelViewSet):
 
 class IsAuthorOrContributorFilter(filters.BaseFilterBackend):
     """
-    The request is authenticated as a user, or is a read-only request.
+    Restricts a queryset to the rows the user authored or whose project the user contributes to.
+    Each model has its own filter method, compiled as a subquery on contributor to avoid join fan-out.
     """
 
     def filter_queryset(self, request, queryset, view):
-        # checking for confirmation of project object by searching contributor attribute
-        if queryset and hasattr(queryset[0], 'contributor_set'):
-            return queryset.filter(Q(author=request.user) |
-                                   Q(contributor__user=request.user))
-        # checking for confirmation of issue object by searching project attribute
+        visibility_filter = getattr(self, 'filter_%s' % queryset.model._meta.model_name, None)
+        if visibility_filter is None:
+            return queryset.none()
+        return visibility_filter(request.user, queryset)
+
+    @staticmethod
+    def contributed_projects(user):
+        return Contributor.objects.filter(user=user).values('project_id')
+
+    def filter_project(self, user, queryset):
+        return queryset.filter(Q(author=user) |
+                               Q(pk__in=self.contributed_projects(user)))
+
+    def filter_issue(self, user, queryset):
         # not including affected_to user because the affected_to user has to be a contributor in all ways
-        if queryset and hasattr(queryset[0], 'project'):
-            return queryset.filter(Q(author=request.user) |
-                                   Q(project__contributor__user=request.user))
-        # checking for confirmation of comment object by searching issue attribute
-        if queryset and hasattr(queryset[0], 'issue'):
-            return queryset.filter(Q(author=request.user) |
-                                   Q(issue__project__contributor__user=request.user))
+        # the contributors of a deleted project are removed at once, its authors need the explicit exclusion
+        return queryset.filter(Q(author=user) & ~Q(project_id__in=deleted_project_ids()) |
+                               Q(project_id__in=self.contributed_projects(user)))
+
+    def filter_comment(self, user, queryset):
+        visible_issues = Issue.objects.filter(project_id__in=self.contributed_projects(user)).values('pk')
+        return queryset.filter(Q(author=user) & ~Q(issue__project_id__in=deleted_project_ids()) |
+                               Q(issue_id__in=visible_issues))
+
+
+class IssueAttributeFilter(filters.BaseFilterBackend):
+    """
+    Restricts issues to the given affected_to, status and priority query parameters.
+    """
+    fields = ['affected_to', 'status', 'priority']
+
+    def filter_queryset(self, request, queryset, view):
+        lookups = {}
+        for field_name in self.fields:
+            value = request.query_params.get(field_name)
+            if value is None:
+                continue
+            try:
+                lookups[field_name] = int(value)
+            except ValueError:
+                raise ValidationError({field_name: 'A valid integer is required.'})
+        return queryset.filter(**lookups)
 
 
 class IsAuthorOrContributor(BasePermission):
@@ -116,38 +217,167 @@ class IsAuthorOrContributor(BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        if request.user == obj.author and request.method in ['GET', 'PUT', 'PATCH', 'DELETE', 'POST']:
+        if request.user.pk == obj.author_id and request.method in ['GET', 'PUT', 'PATCH', 'DELETE', 'POST']:
             return True
-        project_contributor, issue_contributor, comment_contributor = [obj, obj, obj]
-        if obj and hasattr(obj, 'contributor_set'):
-            project_contributor = obj.contributor_set.get(user=request.user, project=obj).user
-        if obj and hasattr(obj, 'project'):
-            issue_contributor = obj.project.contributor_set.get(user=request.user, project=obj.project).user
-        if obj and hasattr(obj, 'issue'):
-            comment_contributor = obj.issue.project.contributor_set. \
-                get(user=request.user, project=obj.issue.project).user
-        if request.user in [project_contributor, issue_contributor, comment_contributor] \
-                and request.method in ['GET', 'POST']:
+        is_contributor = get_project_id(obj) in get_member_project_ids(request)
+        if is_contributor and request.method in ['GET', 'POST']:
             return True
-        if request.user in [project_contributor, issue_contributor, comment_contributor] \
-                and request.method in ['PUT', 'PATCH', 'DELETE']:
+        if is_contributor and request.method in ['PUT', 'PATCH', 'DELETE']:
             return False
         return False
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class BulkWriteMixin:
+    """
+    Adds a bulk route creating (POST) or updating (PATCH) a list of instances in one transaction.
+    Membership is checked once per distinct project and every item gets its own result.
+    """
+    bulk_update_fields = []
+
+    def get_bulk_project_id(self, validated_data):
+        raise NotImplementedError
+
+    def build_bulk_instance(self, validated_data):
+        raise NotImplementedError
+
+    def on_bulk_create(self, instances):
+        pass
+
+    def on_bulk_update(self, previous_instances, instances):
+        pass
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        items = request.data
+        max_batch_size = getattr(settings, 'SUPPORT_BULK_MAX_BATCH_SIZE', 500)
+        if not isinstance(items, list) or not 0 < len(items) <= max_batch_size:
+            return Response({'detail': 'Expected a list of 1 to %s items.' % max_batch_size},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if request.method == 'POST':
+            results = self.bulk_create(request, items)
+            success = status.HTTP_201_CREATED
+        else:
+            results = self.bulk_update(request, items)
+            success = status.HTTP_202_ACCEPTED
+        if all(result['status'] == success for result in results):
+            return Response(results, status=success)
+        return Response(results, status=status.HTTP_207_MULTI_STATUS)
+
+    def prefetch_related_objects(self, items):
+        """
+        Loads the objects referenced by the related fields of all the items, one query per field.
+        """
+        related_objects = {}
+        for field_name, field in self.get_serializer().fields.items():
+            if not isinstance(field, PrimaryKeyRelatedField) or field.read_only:
+                continue
+            pk_field = field.queryset.model._meta.pk
+            pks = set()
+            for item in items:
+                try:
+                    pks.add(pk_field.to_python(item[field_name]))
+                except (KeyError, TypeError, ValueError, AttributeError, DjangoValidationError):
+                    continue
+            pks.discard(None)
+            related_objects[field_name] = field.queryset.in_bulk(pks)
+        return related_objects
+
+    def get_bulk_serializer(self, related_objects, *args, **kwargs):
+        serializer = self.get_serializer(*args, **kwargs)
+        for field_name, objects in related_objects.items():
+            queryset = serializer.fields[field_name].queryset
+            serializer.fields[field_name] = PrefetchedPrimaryKeyRelatedField(objects, queryset=queryset)
+        return serializer
+
+    def bulk_create(self, request, items):
+        results, validated = [], []
+        related_objects = self.prefetch_related_objects(items)
+        for index, item in enumerate(items):
+            serializer = self.get_bulk_serializer(related_objects, data=item)
+            if serializer.is_valid():
+                validated.append((index, serializer.validated_data))
+                results.append(None)
+            else:
+                results.append({'index': index, 'status': status.HTTP_400_BAD_REQUEST, 'errors': serializer.errors})
+        project_ids = {self.get_bulk_project_id(data) for index, data in validated}
+        member_project_ids = set(Contributor.objects.filter(user=request.user, project_id__in=project_ids)
+                                 .values_list('project_id', flat=True))
+        created = []
+        for index, data in validated:
+            if self.get_bulk_project_id(data) in member_project_ids:
+                data['author'] = request.user
+                created.append((index, self.build_bulk_instance(data)))
+            else:
+                results[index] = {'index': index, 'status': status.HTTP_401_UNAUTHORIZED}
+        with write_transaction():
+            instances = self.get_queryset().model.objects.bulk_create([instance for index, instance in created])
+            self.on_bulk_create(instances)
+            invalidate_responses(map(get_project_id, instances), [request.user.pk])
+        for index, instance in created:
+            results[index] = {'index': index, 'status': status.HTTP_201_CREATED, 'id': instance.pk}
+        return results
+
+    def bulk_update(self, request, items):
+        pk_field = self.get_queryset().model._meta.pk
+        pks = []
+        for item in items:
+            try:
+                pks.append(pk_field.to_python(item.get('id')))
+            except (AttributeError, DjangoValidationError):
+                pks.append(None)
+        instances = self.filter_queryset(self.get_queryset()).in_bulk([pk for pk in pks if pk is not None])
+        related_objects = self.prefetch_related_objects(items)
+        results, previous, updated = [], {}, {}
+        for index, (item, pk) in enumerate(zip(items, pks)):
+            instance = instances.get(pk)
+            if instance is None:
+                results.append({'index': index, 'status': status.HTTP_404_NOT_FOUND})
+                continue
+            if instance.author_id != request.user.pk:
+                results.append({'index': index, 'status': status.HTTP_401_UNAUTHORIZED})
+                continue
+            serializer = self.get_bulk_serializer(related_objects, instance, data=item, partial=True)
+            if not serializer.is_valid():
+                results.append({'index': index, 'status': status.HTTP_400_BAD_REQUEST, 'errors': serializer.errors})
+                continue
+            serializer.validated_data.pop('author', None)
+            previous.setdefault(instance.pk, copy(instance))
+            for attr, value in serializer.validated_data.items():
+                setattr(instance, attr, value)
+            instance.updated_at = timezone.now()
+            updated[instance.pk] = instance
+            results.append({'index': index, 'status': status.HTTP_202_ACCEPTED, 'id': instance.pk})
+        with write_transaction():
+            self.get_queryset().model.objects.bulk_update(list(updated.values()), self.bulk_update_fields)
+            self.on_bulk_update(list(previous.values()), list(updated.values()))
+            invalidate_responses([get_project_id(instance) for instance in previous.values()] +
+                                 [get_project_id(instance) for instance in updated.values()], [request.user.pk])
+        return results
+
+
+class ProjectViewSet(SparseFieldsetMixin, ConditionalResponseMixin, CachedResponseMixin, RowReadMixin,
+                     viewsets.ModelViewSet):
     """
     A viewset for viewing and editing project instances.
     """
     permission_classes = [IsSuperUser | IsAuthenticated & IsAuthorOrContributor]
     serializer_class = ProjectSerializer
-    queryset = Project.objects.order_by('-time_created').distinct()
+    queryset = Project.objects.order_by('-time_created')
     filter_backends = [IsAuthorOrContributorFilter]
+    pagination_class = TimeCreatedCursorPagination
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         if instance.author == request.user:
-            instance.__class__.objects.get(pk=instance.pk).delete()
+            # the contributors lose access to the project with its issues and comments, a single tombstone each
+            user_ids = set(instance.contributor_set.values_list('user_id', flat=True)) | {instance.author_id}
+            with write_transaction():
+                # the issues and comments are removed in batches by the deletion worker
+                mark_project_deleted(instance, request.user)
+                Tombstone.objects.bulk_create(record_deletion(Project, [instance.pk], instance.pk, user_ids))
+                invalidate_responses([instance.pk], user_ids)
+                schedule_purge()
+            invalidate_membership(*user_ids)
             return Response(status=status.HTTP_200_OK)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
@@ -158,8 +388,10 @@ class ProjectViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         if instance.author == request.user:
-            serializer.validated_data.pop('author')
-            self.perform_update(serializer)
+            serializer.validated_data.pop('author', None)
+            with write_transaction():
+                self.perform_update(serializer)
+                invalidate_responses([instance.pk])
             return Response(status=status.HTTP_202_ACCEPTED)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
@@ -168,30 +400,74 @@ class ProjectViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=self.request.data)
         serializer.is_valid(raise_exception=True)
         new_project = serializer.validated_data
-        admin = User.objects.get(pk=1)
+        admin_id = get_project_admin_id()
         if request.user.is_authenticated:
-            Project.objects.create(author=request.user, title=new_project['title'],
-                                   description=new_project['description'], type=new_project['type'])
-            Contributor.objects.create(user=request.user, project=Project.objects.last())
-            if not request.user == admin:
-                Contributor.objects.create(user=admin, project=Project.objects.last())
+            user_ids = [request.user.pk]
+            if admin_id is not None and admin_id != request.user.pk:
+                user_ids.append(admin_id)
+            with write_transaction():
+                project = Project.objects.create(author=request.user, title=new_project['title'],
+                                                 description=new_project['description'], type=new_project['type'])
+                Contributor.objects.bulk_create([Contributor(user_id=user_id, project=project)
+                                                 for user_id in user_ids])
+                invalidate_responses(user_ids=user_ids)
+            invalidate_membership(*user_ids)
             return Response(status=status.HTTP_201_CREATED)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
 
-
-class ContributorViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def stats(self, request, *args, **kwargs):
+        """
+        Returns the number of issues of the project by status, priority and tag.
+        """
+        return Response(get_project_issue_counts(self.get_object()))
+
+    @action(detail=True, methods=['get'])
+    def export(self, request, *args, **kwargs):
+        """
+        Streams the issues of the project with their comments, as NDJSON or CSV (?output=csv).
+        WSGI only: Django's ASGI handler iterates the streamed body on the event loop, where the queries of the
+        exporters cannot run.
+        """
+        project = self.get_object()
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORTERS:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        if isinstance(request._request, ASGIRequest):
+            return Response({'detail': 'The export is only served by the WSGI application.'},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+        visibility = IsAuthorOrContributorFilter()
+        issues = visibility.filter_queryset(request, Issue.objects.filter(project=project), self)
+        comments = visibility.filter_queryset(request, Comment.objects.filter(issue__project=project), self)
+        chunk_size = getattr(settings, 'SUPPORT_EXPORT_CHUNK_SIZE', 500)
+        content_type, exporter = EXPORTERS[output]
+        response = StreamingHttpResponse(exporter(issues, comments, self.get_serializer_context(), chunk_size),
+                                         content_type=content_type)
+        response['Content-Disposition'] = 'attachment; filename="project-%s.%s"' % (project.pk, output)
+        return response
+
+
+class ContributorViewSet(SparseFieldsetMixin, ConditionalResponseMixin, RowReadMixin, viewsets.ModelViewSet):
     """
     A viewset for viewing and editing contributor instances.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = ContributorSerializer
     queryset = Contributor.objects.order_by('-pk').distinct()
+    fieldset_required_fields = ['updated_at']
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         if instance.project.author == request.user:
-            instance.__class__.objects.get(pk=instance.pk).delete()
+            with write_transaction():
+                instance.__class__.objects.get(pk=instance.pk).delete()
+                tombstones = record_deletion(Contributor, [instance.pk], instance.project_id)
+                if instance.user_id != instance.project.author_id:
+                    tombstones += record_deletion(Project, [instance.project_id], instance.project_id, [instance.user_id])
+                Tombstone.objects.bulk_create(tombstones)
+                invalidate_responses([instance.project_id], [instance.user_id])
+            invalidate_membership(instance.user_id)
             return Response(status=status.HTTP_200_OK)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
@@ -201,11 +477,26 @@ class ContributorViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        user = serializer.validated_data['user']
-        project = serializer.validated_data['project']
-        if not instance.__class__.objects.filter(user=user, project=project) \
-                and instance.project.author == request.user and project.author == request.user:
-            self.perform_update(serializer)
+        # a partial update keeps the current user or project, loaded only then
+        user = serializer.validated_data['user'] if 'user' in serializer.validated_data else instance.user
+        project = serializer.validated_data['project'] if 'project' in serializer.validated_data else instance.project
+        if instance.project.author == request.user and project.author == request.user:
+            previous_user_id, previous_project = instance.user_id, instance.project
+            try:
+                with write_transaction():
+                    self.perform_update(serializer)
+                    tombstones = record_moves([(Contributor, instance.pk, previous_project.pk, project.pk, None)])
+                    # the previous user loses access to the previous project unless they are its author
+                    if (previous_user_id, previous_project.pk) != (user.pk, project.pk) and \
+                            previous_user_id != previous_project.author_id:
+                        tombstones += record_deletion(Project, [previous_project.pk], previous_project.pk,
+                                                      [previous_user_id])
+                    Tombstone.objects.bulk_create(tombstones)
+                    invalidate_responses([previous_project.pk, project.pk], [previous_user_id, user.pk])
+            except IntegrityError:
+                # the user already contributes to the project, rejected by the unique_contributor constraint
+                return Response(status=status.HTTP_401_UNAUTHORIZED)
+            invalidate_membership(previous_user_id, user.pk)
             return Response(status=status.HTTP_202_ACCEPTED)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
@@ -215,26 +506,62 @@ class ContributorViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
         project = serializer.validated_data['project']
-        if not Contributor.objects.filter(user=user, project=project) and project.author == request.user:
-            Contributor.objects.create(user=user, project=project)
+        if project.author == request.user:
+            try:
+                with write_transaction():
+                    Contributor.objects.create(user=user, project=project)
+            except IntegrityError:
+                # the user already contributes to the project, rejected by the unique_contributor constraint
+                return Response(status=status.HTTP_401_UNAUTHORIZED)
+            invalidate_membership(user.pk)
+            invalidate_responses([project.pk], [user.pk])
             return Response(status=status.HTTP_201_CREATED)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
 
 
-class IssueViewSet(viewsets.ModelViewSet):
+class IssueViewSet(SparseFieldsetMixin, ConditionalResponseMixin, CachedResponseMixin, RowReadMixin,
+                   BulkWriteMixin, viewsets.ModelViewSet):
     """
     A viewset for viewing and editing issue instances.
     """
     permission_classes = [IsSuperUser | IsAuthenticated & IsAuthorOrContributor]
     serializer_class = IssueSerializer
-    queryset = Issue.objects.order_by('-time_created').distinct()
-    filter_backends = [IsAuthorOrContributorFilter]
+    queryset = Issue.objects.order_by('-time_created')
+    fieldset_required_fields = ['project', 'author', 'time_created', 'updated_at']
+    filter_backends = [IsAuthorOrContributorFilter, IssueAttributeFilter]
+    pagination_class = TimeCreatedCursorPagination
+    bulk_update_fields = ['project', 'description', 'affected_to', 'status', 'priority', 'tag', 'updated_at']
+
+    def get_bulk_project_id(self, validated_data):
+        return validated_data['project'].pk
+
+    def build_bulk_instance(self, validated_data):
+        return Issue(**validated_data)
+
+    def on_bulk_create(self, instances):
+        apply_issue_counts(count_issues(instances))
+        index_issues(instances)
+
+    def on_bulk_update(self, previous_instances, instances):
+        counts = count_issues(previous_instances, -1)
+        counts.update(count_issues(instances))
+        apply_issue_counts(counts)
+        index_issues(instances)
+        Tombstone.objects.bulk_create(record_issue_moves(
+            instances, {instance.pk: instance.project_id for instance in previous_instances}))
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         if instance.author == request.user:
-            instance.__class__.objects.get(pk=instance.pk).delete()
+            with write_transaction():
+                tombstones = record_deletion(Issue, [instance.pk], instance.project_id)
+                tombstones += record_deletion(Comment, instance.comment_set.values_list('pk', flat=True),
+                                              instance.project_id)
+                instance.__class__.objects.get(pk=instance.pk).delete()
+                apply_issue_counts(count_issues([instance], -1))
+                Tombstone.objects.bulk_create(tombstones)
+                invalidate_responses([instance.project_id], [request.user.pk])
             return Response(status=status.HTTP_200_OK)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
@@ -245,8 +572,16 @@ class IssueViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         if instance.author == request.user:
-            serializer.validated_data.pop('author')
-            self.perform_update(serializer)
+            serializer.validated_data.pop('author', None)
+            counts = count_issues([instance], -1)
+            previous_project_id = instance.project_id
+            with write_transaction():
+                self.perform_update(serializer)
+                counts.update(count_issues([instance]))
+                apply_issue_counts(counts)
+                index_issues([instance])
+                Tombstone.objects.bulk_create(record_issue_moves([instance], {instance.pk: previous_project_id}))
+                invalidate_responses([previous_project_id, instance.project_id], [request.user.pk])
             return Response(status=status.HTTP_202_ACCEPTED)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
@@ -259,26 +594,50 @@ class IssueViewSet(viewsets.ModelViewSet):
             new_issue['project'], new_issue['description'], new_issue['affected_to'], \
             new_issue['status'], new_issue['priority'], new_issue['tag']
         if Contributor.objects.filter(user=request.user, project=new_issue['project']):
-            Issue.objects.create(project=project, author=request.user, description=description,
-                                 affected_to=affected_to, status=statut, priority=priority, tag=tag)
+            with write_transaction():
+                issue = Issue.objects.create(project=project, author=request.user, description=description,
+                                             affected_to=affected_to, status=statut, priority=priority, tag=tag)
+                apply_issue_counts(count_issues([issue]))
+                index_issues([issue])
+                invalidate_responses([project.pk], [request.user.pk])
             return Response(status=status.HTTP_201_CREATED)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(SparseFieldsetMixin, ConditionalResponseMixin, CachedResponseMixin, RowReadMixin,
+                     BulkWriteMixin, viewsets.ModelViewSet):
     """
     A viewset for viewing and editing comment instances.
     """
     permission_classes = [IsSuperUser | IsAuthenticated & IsAuthorOrContributor]
     serializer_class = CommentSerializer
-    queryset = Comment.objects.order_by('-time_created').distinct()
+    queryset = Comment.objects.select_related('issue').order_by('-time_created')
     filter_backends = [IsAuthorOrContributorFilter]
+    pagination_class = TimeCreatedCursorPagination
+    bulk_update_fields = ['issue', 'description', 'updated_at']
+
+    def get_bulk_project_id(self, validated_data):
+        return validated_data['issue'].project_id
+
+    def build_bulk_instance(self, validated_data):
+        return Comment(**validated_data)
+
+    def on_bulk_create(self, instances):
+        index_comments(instances)
+
+    def on_bulk_update(self, previous_instances, instances):
+        index_comments(instances)
+        Tombstone.objects.bulk_create(record_comment_moves(
+            instances, {instance.pk: instance.issue.project_id for instance in previous_instances}))
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         if instance.author == request.user:
-            instance.__class__.objects.get(pk=instance.pk).delete()
+            with write_transaction():
+                instance.__class__.objects.get(pk=instance.pk).delete()
+                Tombstone.objects.bulk_create(record_deletion(Comment, [instance.pk], instance.issue.project_id))
+                invalidate_responses([instance.issue.project_id], [request.user.pk])
             return Response(status=status.HTTP_200_OK)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
@@ -289,8 +648,13 @@ class CommentViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         if instance.author == request.user:
-            serializer.validated_data.pop('author')
-            self.perform_update(serializer)
+            serializer.validated_data.pop('author', None)
+            previous_project_id = instance.issue.project_id
+            with write_transaction():
+                self.perform_update(serializer)
+                index_comments([instance])
+                Tombstone.objects.bulk_create(record_comment_moves([instance], {instance.pk: previous_project_id}))
+                invalidate_responses([previous_project_id, instance.issue.project_id], [request.user.pk])
             return Response(status=status.HTTP_202_ACCEPTED)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
@@ -300,8 +664,85 @@ class CommentViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         new_comment = serializer.validated_data
         if Contributor.objects.filter(user=request.user, project=new_comment['issue'].project):
-            Comment.objects.create(issue=new_comment['issue'], author=request.user,
-                                   description=new_comment['description'])
+            with write_transaction():
+                comment = Comment.objects.create(issue=new_comment['issue'], author=request.user,
+                                                 description=new_comment['description'])
+                index_comments([comment])
+                invalidate_responses([new_comment['issue'].project_id], [request.user.pk])
             return Response(status=status.HTTP_201_CREATED)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+
+class SearchViewSet(viewsets.ViewSet):
+    """
+    A viewset for searching the descriptions of the issues and comments visible to the user.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('page_size', 10)), getattr(settings, 'SUPPORT_MAX_PAGE_SIZE', 100))
+            offset = int(request.query_params.get('offset', 0))
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1 or offset < 0:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        try:
+            results = search(request.user, query, limit, offset)
+        except NotImplementedError as exc:
+            # no full-text index on the database backend
+            return Response({'detail': str(exc)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        return Response({'results': results})
+
+
+class ChangeViewSet(viewsets.ViewSet):
+    """
+    A viewset for listing the projects, contributors, issues and comments modified or deleted since a position.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request, *args, **kwargs):
+        try:
+            limit = min(int(request.query_params.get('page_size', 100)), getattr(settings, 'SUPPORT_MAX_PAGE_SIZE', 100))
+            if 'cursor' in request.query_params:
+                position = decode_cursor(request.query_params['cursor'])
+            elif 'since' in request.query_params:
+                since = parse_datetime(request.query_params['since'])
+                if since is None:
+                    raise ValueError('Invalid since.')
+                if timezone.is_naive(since):
+                    since = timezone.make_aware(since, timezone.utc)
+                position = (since, -1, '')
+            else:
+                position = None
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        results, position = get_changes(request.user, position, limit, {'request': request})
+        return Response({'results': results, 'next': encode_cursor(*position) if position else None})
+
+
+class ProjectDeletionViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    A viewset for following the progress of the deletions of the projects of the user.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ProjectDeletionSerializer
+    queryset = ProjectDeletion.objects.order_by('-requested_at', '-pk')
+
+    def get_queryset(self):
+        return super().get_queryset().filter(author=self.request.user)
+
+
+class MetricsViewSet(viewsets.ViewSet):
+    """
+    A viewset for reading the per-route timing histograms recorded by the instrumentation middleware.
+    """
+    permission_classes = [IsSuperUser]
+
+    def list(self, request, *args, **kwargs):
+        return Response({'enabled': getattr(settings, 'SUPPORT_INSTRUMENTATION', False),
+                         'routes': histograms.summary(), 'response_cache': counters.summary()})
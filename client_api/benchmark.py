@@ -0,0 +1,221 @@
+"""
+Load-testing harness for the SoftDesk API.
+
+Starts the WSGI application of SoftDeskAPI in a local threaded server (or targets --url), authenticates
+seeded users through /api/token/, runs a concurrent mix of reads and writes and prints a JSON report
+with the throughput and the p50/p95/p99 latencies of every operation.
+
+    cd backend/SoftDeskAPI && python manage.py seed_dataset && cd ../..
+    python client_api/benchmark.py --duration 30 --concurrency 16 --output bench.json
+    python client_api/benchmark.py --duration 30 --concurrency 16 --compare bench.json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import requests
+
+from client import SoftDeskClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend' / 'SoftDeskAPI'
+
+# Operations of the mix with their weights
+READS = [('project-list', 10), ('project-detail', 10), ('issue-list', 25), ('issue-detail', 15),
+         ('comment-list', 20), ('comment-detail', 10), ('project-stats', 5), ('search', 5)]
+WRITES = [('issue-create', 50), ('comment-create', 40), ('issue-update', 10)]
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port):
+    """
+    Serves SoftDeskAPI.wsgi.application from a background thread, returns its base URL.
+    """
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SoftDeskAPI.settings')
+    from SoftDeskAPI.wsgi import application
+    server = make_server('127.0.0.1', port, application, server_class=ThreadingWSGIServer,
+                         handler_class=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return 'http://127.0.0.1:%s' % server.server_port
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+class Worker:
+    """
+    One virtual client: a SoftDeskClient authenticated as one user, with the ids it works on.
+    The error responses raise requests.HTTPError, counted as failures.
+    """
+
+    def __init__(self, url, username, password, rng):
+        self.username, self.rng = username, rng
+        self.client = SoftDeskClient(url, username, password, pool_size=1)
+        self.projects = [project['id'] for project in self.client.get('/projects/', page_size=100)['results']]
+        issues = self.client.get('/issues/', page_size=100)['results']
+        self.user_id = self.client.user_id
+        self.issues = [issue['id'] for issue in issues]
+        self.own_issues = [issue['id'] for issue in issues if issue['author'] == self.user_id]
+        self.comments = [comment['id'] for comment in self.client.get('/comments/', page_size=100)['results']]
+
+    def request(self, method, path, **kwargs):
+        return self.client.request(method, path, **kwargs)
+
+    def get(self, path):
+        return self.request('GET', path)
+
+    def run(self, operation):
+        rng = self.rng
+        if operation == 'project-list':
+            return self.get('/projects/')
+        if operation == 'project-detail':
+            return self.get('/projects/%s/' % rng.choice(self.projects))
+        if operation == 'project-stats':
+            return self.get('/projects/%s/stats/' % rng.choice(self.projects))
+        if operation == 'issue-list':
+            return self.get('/issues/')
+        if operation == 'issue-detail':
+            return self.get('/issues/%s/' % rng.choice(self.issues))
+        if operation == 'comment-list':
+            return self.get('/comments/')
+        if operation == 'comment-detail':
+            return self.get('/comments/%s/' % rng.choice(self.comments))
+        if operation == 'search':
+            return self.get('/search/?q=%s' % rng.choice(['login', 'payment', 'crash', 'export']))
+        if operation == 'issue-create':
+            return self.request('POST', '/issues/', json={
+                'project': rng.choice(self.projects), 'author': self.user_id, 'affected_to': self.user_id,
+                'description': 'Benchmark issue', 'status': 0, 'priority': 0, 'tag': 0})
+        if operation == 'comment-create':
+            return self.request('POST', '/comments/', json={
+                'issue': rng.choice(self.issues), 'author': self.user_id, 'description': 'Benchmark comment'})
+        if operation == 'issue-update':
+            return self.request('PATCH', '/issues/%s/' % rng.choice(self.own_issues or self.issues),
+                                json={'author': self.user_id, 'status': rng.randint(0, 2)})
+        raise ValueError(operation)
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    summary = {'requests': len(latencies), 'errors': errors, 'throughput': round(len(latencies) / elapsed, 2)}
+    if latencies:
+        summary.update({'p50_ms': round(percentile(latencies, 0.5), 2),
+                        'p95_ms': round(percentile(latencies, 0.95), 2),
+                        'p99_ms': round(percentile(latencies, 0.99), 2)})
+    return summary
+
+
+def run_benchmark(url, users, password, concurrency, duration, write_ratio, seed):
+    latencies, errors = {}, {}
+    lock = threading.Lock()
+    workers = [Worker(url, users[index % len(users)], password, random.Random(seed + index))
+               for index in range(concurrency)]
+    for worker in workers:
+        if not (worker.projects and worker.issues and worker.comments):
+            raise SystemExit('User %s has nothing to work on, seed a dataset first.' % worker.username)
+    deadline = time.perf_counter() + duration
+
+    def client(worker):
+        rng = worker.rng
+        while time.perf_counter() < deadline:
+            operations = WRITES if rng.random() < write_ratio else READS
+            operation = rng.choices([name for name, weight in operations],
+                                    [weight for name, weight in operations])[0]
+            start = time.perf_counter()
+            try:
+                failed = worker.run(operation).status_code >= 400
+            except requests.RequestException:
+                failed = True
+            latency = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.setdefault(operation, []).append(latency)
+                errors[operation] = errors.get(operation, 0) + failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(client, workers))
+    elapsed = time.perf_counter() - started
+    return {'total': summarize([latency for values in latencies.values() for latency in values],
+                               sum(errors.values()), elapsed),
+            'operations': {operation: summarize(values, errors[operation], elapsed)
+                           for operation, values in sorted(latencies.items())}}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=str(BACKEND_DIR),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, report):
+    """
+    Returns the relative change of the throughput and p95 of every operation present in both reports.
+    """
+    changes = {}
+    current_operations = dict(report['operations'], total=report['total'])
+    baseline_operations = dict(baseline['operations'], total=baseline['total'])
+    for operation, current in current_operations.items():
+        previous = baseline_operations.get(operation)
+        if not previous or not previous.get('throughput') or not previous.get('p95_ms'):
+            continue
+        changes[operation] = {
+            'throughput': '%+.1f%%' % ((current['throughput'] / previous['throughput'] - 1) * 100),
+            'p95_ms': '%+.1f%%' % ((current.get('p95_ms', 0) / previous['p95_ms'] - 1) * 100)}
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Benchmark a running server instead of starting one.')
+    parser.add_argument('--port', type=int, default=0, help='Port of the local server, any free port by default.')
+    parser.add_argument('--users', default='seed0,seed1,seed2,seed3,seed4,seed5,seed6,seed7',
+                        help='Comma-separated usernames the clients authenticate as.')
+    parser.add_argument('--password', default='seed-password')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20, help='Seconds of load.')
+    parser.add_argument('--write-ratio', type=float, default=0.1, help='Share of write operations in the mix.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Also write the JSON report to this file.')
+    parser.add_argument('--compare', help='JSON report of a previous run to compare against.')
+    args = parser.parse_args()
+
+    url = args.url or start_server(args.port)
+    results = run_benchmark(url, args.users.split(','), args.password, args.concurrency, args.duration,
+                            args.write_ratio, args.seed)
+    report = {'revision': git_revision(), 'date': datetime.now(timezone.utc).isoformat(),
+              'server': args.url or 'wsgi', 'concurrency': args.concurrency, 'duration': args.duration,
+              'write_ratio': args.write_ratio}
+    report.update(results)
+    if args.compare:
+        with open(args.compare) as baseline:
+            report['comparison'] = {'baseline': args.compare, 'changes': compare(json.load(baseline), report)}
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
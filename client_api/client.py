@@ -0,0 +1,153 @@
+"""
+Python client for the SoftDesk API.
+
+    client = SoftDeskClient('http://localhost:8000', 'user1', 'password')
+    for issue in client.iter('/issues/', page_size=100):
+        print(issue['id'], issue['description'])
+
+    async_client = AsyncSoftDeskClient(client, concurrency=8)
+    issues = asyncio.run(async_client.get_many(['/issues/1/', '/issues/2/', '/issues/3/']))
+"""
+import asyncio
+import base64
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def token_claims(token):
+    """
+    Returns the claims of a JWT, read from its payload without verifying it.
+    """
+    payload = token.split('.')[1]
+    return json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+
+
+class SoftDeskClient:
+    """
+    A thread-safe client keeping pooled keep-alive connections, and refreshing its access token
+    through /api/token/refresh/ shortly before it expires.
+    """
+
+    def __init__(self, base_url, username, password, pool_size=10, timeout=30, refresh_margin=10):
+        self.base_url = base_url.rstrip('/')
+        self.username, self.password = username, password
+        self.timeout, self.refresh_margin = timeout, refresh_margin
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.lock = threading.Lock()
+        self.access = self.refresh = self.user_id = None
+        self.access_expiry = self.refresh_expiry = 0
+
+    def login(self):
+        response = self.session.post(self.base_url + '/api/token/', timeout=self.timeout,
+                                     data={'username': self.username, 'password': self.password})
+        response.raise_for_status()
+        tokens = response.json()
+        self.access, self.refresh = tokens['access'], tokens['refresh']
+        claims = token_claims(self.access)
+        self.user_id, self.access_expiry = claims['user_id'], claims['exp']
+        self.refresh_expiry = token_claims(self.refresh)['exp']
+
+    def refresh_access(self):
+        response = self.session.post(self.base_url + '/api/token/refresh/', timeout=self.timeout,
+                                     data={'refresh': self.refresh})
+        if response.status_code == 401:
+            self.login()
+            return
+        response.raise_for_status()
+        self.access = response.json()['access']
+        self.access_expiry = token_claims(self.access)['exp']
+
+    def authorization(self):
+        """
+        Returns the Authorization header, logging in or refreshing the access token when needed.
+        """
+        with self.lock:
+            now = time.time()
+            if self.access is None or now > self.refresh_expiry - self.refresh_margin:
+                self.login()
+            elif now > self.access_expiry - self.refresh_margin:
+                self.refresh_access()
+            return 'Bearer ' + self.access
+
+    def request(self, method, path, **kwargs):
+        url = path if path.startswith('http') else self.base_url + path
+        headers = dict(kwargs.pop('headers', {}), Authorization=self.authorization())
+        response = self.session.request(method, url, headers=headers, timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def get(self, path, **params):
+        return self.request('GET', path, params=params or None).json()
+
+    def post(self, path, data):
+        return self.request('POST', path, json=data)
+
+    def put(self, path, data):
+        return self.request('PUT', path, json=data)
+
+    def patch(self, path, data):
+        return self.request('PATCH', path, json=data)
+
+    def delete(self, path):
+        return self.request('DELETE', path)
+
+    def iter_pages(self, path, **params):
+        """
+        Yields the pages of a list endpoint one at a time, following their next links.
+        """
+        page = self.get(path, **params)
+        yield page['results']
+        while page.get('next'):
+            page = self.get(page['next'])
+            yield page['results']
+
+    def iter(self, path, **params):
+        """
+        Yields the items of a list endpoint across all its pages, fetching each page only when needed.
+        """
+        for results in self.iter_pages(path, **params):
+            yield from results
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncSoftDeskClient:
+    """
+    Runs the calls of a SoftDeskClient from asyncio over its pooled session, bounded to concurrency
+    calls in flight by the size of the thread pool they run on.
+    """
+
+    def __init__(self, client, concurrency=8):
+        self.client = client
+        self.executor = ThreadPoolExecutor(concurrency)
+
+    async def call(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def get(self, path):
+        return await self.call(self.client.get, path)
+
+    async def post(self, path, data):
+        return await self.call(self.client.post, path, data)
+
+    async def get_many(self, paths):
+        """
+        Fetches every path concurrently, returns the responses in the order of the paths.
+        """
+        return await asyncio.gather(*[self.get(path) for path in paths])
+
+    async def post_many(self, path, items):
+        return await asyncio.gather(*[self.post(path, item) for item in items])
+
+    def close(self):
+        self.executor.shutdown()
+        self.client.close()